@@ -1,10 +1,69 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import json
 
 # Configuration
 API_URL = "http://127.0.0.1:8000"  # FastAPI backend
+STREAM_TIMEOUT = (5, 60)  # (connect, between-chunks) seconds
+HTTP_POOL_SIZE = 32  # keep-alive connections shared by every session on this server
+ANSWER_CACHE_TTL = 600  # seconds a finished answer is reused for the same question
+ANSWER_CACHE_ENTRIES = 500
+
+@st.cache_resource
+def get_http_session():
+    """One pooled HTTP session per Streamlit server, so clicks reuse keep-alive connections to the backend"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def normalize_question(question):
+    return " ".join(question.lower().split()).rstrip("?!.,; ")
+
+@st.cache_data(ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_ENTRIES, show_spinner=False)
+def cached_answer(question_key, _answer=None):
+    """Finished answers shared across sessions; call with `_answer` to store, without it to look up.
+
+    A miss raises LookupError, and Streamlit never caches exceptions, so lookups do not fill the cache.
+    """
+    if _answer is None:
+        raise LookupError(question_key)
+    return _answer
+
+def stream_answer(question):
+    """Yields (event, data) pairs from the server-sent events of /ask/stream"""
+    with get_http_session().post(
+        f"{API_URL}/ask/stream",
+        json={"question": question},
+        stream=True,
+        timeout=STREAM_TIMEOUT
+    ) as response:
+        if response.status_code != 200:
+            yield "error", {"status": response.status_code}
+            return
+        event = "message"
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):])
+
+def render_answer(answer_text, meta=None):
+    details = ""
+    if meta:
+        details = f"""<p style="color: rgba(255,255,255,0.7); font-size: 0.85rem; margin-bottom: 0.8rem;">
+            📊 {meta.get("confidence_level", "")} · 📚 {", ".join(meta.get("data_sources", [])) or "general knowledge"}
+        </p>"""
+    return f"""
+    <div class="answer-container">
+        <div class="answer-title">🎯 Your Travel Insights</div>
+        {details}
+        <div class="answer-text">{answer_text}</div>
+    </div>
+    """
 
 # Page config
 st.set_page_config(
@@ -15,8 +74,7 @@ st.set_page_config(
 )
 
 # --- Enhanced Custom CSS ---
-st.markdown("""
-<style>
+APP_CSS = """
 @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700;800&display=swap');
 
 * {
@@ -410,8 +468,23 @@ footer { visibility: hidden; }
 ::-webkit-scrollbar-thumb:hover {
     background: rgba(78, 205, 196, 0.7);
 }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+def inject_css_once():
+    """Adds the stylesheet to the page head on a session's first run; it stays there across reruns"""
+    if st.session_state.get("css_injected"):
+        return
+    st.html(f"""<script>
+if (!document.getElementById("travel-agent-css")) {{
+    const style = document.createElement("style");
+    style.id = "travel-agent-css";
+    style.textContent = {json.dumps(APP_CSS)};
+    document.head.appendChild(style);
+}}
+</script>""", unsafe_allow_javascript=True)
+    st.session_state.css_injected = True
+
+inject_css_once()
 
 # --- Main Container ---
 st.markdown('<div class="main-container">', unsafe_allow_html=True)
@@ -491,19 +564,36 @@ if ask_button and question.strip():
     </div>
     """, unsafe_allow_html=True)
     
+    meta = None
+    answer_text = ""
+    question_key = normalize_question(question)
     try:
-        # Make API call to FastAPI backend
-        response = requests.post(
-            f"{API_URL}/ask",
-            json={"question": question},
-            timeout=15
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            answer_text = data.get("answer", "No answer returned.")
-        else:
-            answer_text = f"⚠️ API returned status {response.status_code}. Please try again later."
+        cached = cached_answer(question_key)
+        answer_text, meta = cached["answer"], cached["meta"]
+    except LookupError:
+        cached = None
+    try:
+        # Stream the answer from the FastAPI backend, rendering tokens as they arrive
+        finished = False
+        for event, data in ([] if cached else stream_answer(question)):
+            if event == "meta":
+                meta = data
+            elif event == "token":
+                answer_text += data["text"]
+                loading_placeholder.markdown(render_answer(answer_text + " ▌", meta), unsafe_allow_html=True)
+            elif event == "done":
+                answer_text = data.get("answer") or answer_text
+                finished = bool(answer_text)
+            elif event == "error":
+                if answer_text:
+                    answer_text += "\n\n⚠️ The answer was interrupted. Please try again."
+                else:
+                    answer_text = f"⚠️ API returned status {data['status']}. Please try again later."
+                finished = False
+        if finished:
+            cached_answer(question_key, _answer={"answer": answer_text, "meta": meta})
+        if not answer_text:
+            answer_text = "No answer returned."
             
     except requests.exceptions.ConnectionError:
         # Fallback response when API is not available
@@ -523,15 +613,8 @@ if ask_button and question.strip():
     except Exception as e:
         answer_text = f"❌ An unexpected error occurred. Please try again later."
     
-    # Clear loading and show answer
-    loading_placeholder.empty()
-    
-    st.markdown(f"""
-    <div class="answer-container">
-        <div class="answer-title">🎯 Your Travel Insights</div>
-        <div class="answer-text">{answer_text}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Replace loading (or the partial stream) with the final answer
+    loading_placeholder.markdown(render_answer(answer_text, meta), unsafe_allow_html=True)
     
     # Add follow-up suggestions
     st.markdown("""
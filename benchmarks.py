@@ -0,0 +1,449 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+# Benchmarks run against a scratch Qdrant; point QDRANT_URL at a throwaway server for large corpora
+os.environ.setdefault("QDRANT_URL", ":memory:")
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "travel-bench-snapshots"))
+
+import traveler_2
+from traveler_2 import EmbeddingBatcher, EMBEDDING_BACKENDS, create_embedding_backend, embedder, embed_executor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STAGE_BASELINE = os.path.join(HERE, "stage_baseline.json")
+PLACES = ["Paris", "Tokyo", "Rome", "Bali", "Dubai", "Iceland", "Lisbon", "Kyoto", "Cusco", "Hanoi"]
+TOPICS = ["museums", "beaches", "temples", "street food", "hiking", "nightlife", "markets", "festivals"]
+SEASONS = ["spring", "summer", "autumn", "winter"]
+
+def synthetic_docs(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        place = f"{rng.choice(PLACES)}{i % 5000}"
+        yield (f"{place} is known for {rng.choice(TOPICS)} and {rng.choice(TOPICS)}, "
+               f"best visited in {rng.choice(SEASONS)} when travelers enjoy local {rng.choice(TOPICS)}.")
+
+# ----------------------------
+# Hybrid search
+async def _hybrid_search(sizes, batch_size: int, repeats: int, upsert_batch: int):
+    # Random unit vectors keep encode time out of the numbers; the sparse half is real BM25 terms
+    rng = np.random.default_rng(0)
+    doc_stream = synthetic_docs(max(sizes) + len(sizes) * repeats * batch_size)
+    stored = 0
+
+    def points(count: int):
+        docs = [next(doc_stream) for _ in range(count)]
+        vectors = rng.standard_normal((count, traveler_2.EMBEDDING_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return [traveler_2.make_point(doc, vector.tolist(), None, "bench", traveler_2.doc_point_id(doc, None))
+                for doc, vector in zip(docs, vectors)]
+
+    await traveler_2.setup_qdrant_collection()
+    client = traveler_2.qdrant_client
+    query = "best temples and street food in Kyoto during spring"
+    query_vec = rng.standard_normal(traveler_2.EMBEDDING_DIM).astype(np.float32)
+    print(f"{'corpus docs':>12} {'upsert ms/batch':>16} {'hybrid query ms':>16}")
+    for size in sorted(sizes):
+        while stored < size:
+            count = min(upsert_batch, size - stored)
+            await client.upsert(collection_name=traveler_2.COLLECTION_NAME, points=points(count))
+            stored += count
+        start = time.perf_counter()
+        for _ in range(repeats):
+            await client.upsert(collection_name=traveler_2.COLLECTION_NAME, points=points(batch_size))
+        upsert_ms = (time.perf_counter() - start) * 1000 / repeats
+        stored += repeats * batch_size
+        start = time.perf_counter()
+        for _ in range(repeats):
+            await traveler_2.retrieve_with_intelligence(query, query_vec=query_vec)
+        query_ms = (time.perf_counter() - start) * 1000 / repeats
+        print(f"{size:>12,} {upsert_ms:>16.3f} {query_ms:>16.2f}")
+
+def bench_hybrid_search(sizes, batch_size: int, repeats: int, upsert_batch: int):
+    """Upsert latency of a small batch (the /contribute and learner shape) and hybrid query latency vs corpus size"""
+    asyncio.run(_hybrid_search(sizes, batch_size, repeats, upsert_batch))
+
+# ----------------------------
+# Per-stage scaling
+async def _median_ms(run, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+STAGES = ("encode", "keyword_vectors", "dense_search", "keyword_search", "hybrid_search", "confidence",
+          "context_packing", "ingest")
+
+async def _stages(sizes, repeats: int, ingest_batch: int, upsert_batch: int) -> dict:
+    rng = np.random.default_rng(1)
+    doc_stream = synthetic_docs(max(sizes) + len(sizes) * (repeats + 1) * ingest_batch, seed=5)
+    await traveler_2.setup_qdrant_collection()
+    client = traveler_2.qdrant_client
+    collection = traveler_2.COLLECTION_NAME
+    query = "best temples and street food in Kyoto during spring"
+    queries = [f"{query} day {i}" for i in range(32)]
+    query_vec = traveler_2.embedder.encode([query])[0].tolist()
+    keywords = traveler_2.sparse_query_vector(query)
+    dense_only = traveler_2.QueryRequest(query=query_vec, limit=5, with_payload=True, with_vector=True)
+    keyword_only = traveler_2.QueryRequest(query=keywords, using=traveler_2.SPARSE_VECTOR_NAME, limit=5,
+                                           with_payload=True, with_vector=True)
+    hybrid = traveler_2.hybrid_request(query, query_vec, 5)
+    results, stored = {}, 0
+    for size in sorted(sizes):
+        # Random unit vectors grow the corpus quickly; the stages below encode with the selected backend
+        while stored < size:
+            docs = [next(doc_stream) for _ in range(min(upsert_batch, size - stored))]
+            vectors = rng.standard_normal((len(docs), traveler_2.EMBEDDING_DIM)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            await client.upsert(collection_name=collection, points=[
+                traveler_2.make_point(doc, vector.tolist(), None, "bench", traveler_2.doc_point_id(doc, None))
+                for doc, vector in zip(docs, vectors)])
+            stored += len(docs)
+        sample_docs = [next(doc_stream) for _ in range(ingest_batch)]
+        hits = (await traveler_2.hybrid_query_batch([hybrid]))[0]
+
+        async def encode():
+            traveler_2.embedder.encode(queries)
+
+        async def keyword_vectors():
+            traveler_2.sparse_query_vector(query)
+            for doc in sample_docs:
+                traveler_2.sparse_doc_vector(doc)
+
+        async def search(request):
+            await client.query_batch_points(collection_name=collection, requests=[request])
+
+        async def confidence():
+            traveler_2.summarize_hits(hits, query_vec)
+
+        docs, _, _, _, doc_vectors = traveler_2.summarize_hits(hits, query_vec)
+
+        async def context_packing():
+            traveler_2.pack_context(query_vec, docs, doc_vectors)
+
+        async def ingest():
+            await traveler_2.ingest_travel_data([next(doc_stream) for _ in range(ingest_batch)])
+
+        timings = {
+            "encode": await _median_ms(encode, repeats),
+            "keyword_vectors": await _median_ms(keyword_vectors, repeats),
+            "dense_search": await _median_ms(lambda: search(dense_only), repeats),
+            "keyword_search": await _median_ms(lambda: search(keyword_only), repeats),
+            "hybrid_search": await _median_ms(lambda: search(hybrid), repeats),
+            "confidence": await _median_ms(confidence, repeats),
+            "context_packing": await _median_ms(context_packing, repeats),
+            "ingest": await _median_ms(ingest, repeats),
+        }
+        stored += repeats * ingest_batch
+        results[str(size)] = {stage: round(ms, 3) for stage, ms in timings.items()}
+    return results
+
+def run_stages(sizes, repeats: int, ingest_batch: int, upsert_batch: int, embed_backend: str = "hash") -> dict:
+    """Median ms per stage (see STAGES) for each corpus size, encoding with `embed_backend`"""
+    original = traveler_2.embedder
+    traveler_2.embedder = create_embedding_backend(embed_backend)
+    try:
+        return asyncio.run(_stages(sizes, repeats, ingest_batch, upsert_batch))
+    finally:
+        traveler_2.embedder = original
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> bool:
+    """False when a stage is missing from the baseline or slower than it by more than the tolerance"""
+    compared = [size for size in results if size in baseline]
+    if not compared:
+        print(f"the baseline has none of the corpus sizes {sorted(map(int, results))}; nothing to compare")
+        return False
+    missing = [(size, stage) for size in compared for stage in results[size] if stage not in baseline[size]]
+    for size, stage in missing:
+        print(f"MISSING {stage} @ {int(size):,} docs: not in the baseline, regenerate it with --save-baseline")
+    # A stage regresses only when it is both relatively and absolutely slower, so sub-ms jitter passes
+    regressions = [(size, stage, baseline[size][stage], ms)
+                   for size in compared for stage, ms in results[size].items()
+                   if stage in baseline[size] and ms > baseline[size][stage] * (1 + tolerance)
+                   and ms - baseline[size][stage] > min_delta_ms]
+    for size, stage, before, after in regressions:
+        print(f"REGRESSION {stage} @ {int(size):,} docs: {before:.3f} ms -> {after:.3f} ms")
+    if not regressions and not missing:
+        print(f"no stage slower than baseline by more than {tolerance:.0%}")
+    return not regressions and not missing
+
+def bench_stages(sizes, repeats: int, ingest_batch: int, upsert_batch: int, baseline_path=STAGE_BASELINE,
+                 save_baseline=None, tolerance: float = 0.25, min_delta_ms: float = 0.5,
+                 embed_backend: str = "hash") -> bool:
+    """Median ms per retrieval/ingest stage vs corpus size; False when a stage regressed past the baseline.
+
+    RRF fusion runs inside Qdrant as part of the hybrid query and cannot be timed on its own, so it is
+    covered by hybrid_search. encode and ingest use the deterministic hash backend unless told otherwise,
+    so they are timed on every machine. Timings are machine-specific: regenerate the baseline with
+    --save-baseline on the machine that runs the check.
+    """
+    results = run_stages(sizes, repeats, ingest_batch, upsert_batch, embed_backend)
+    print(f"{'corpus docs':>12} " + " ".join(f"{stage:>15}" for stage in STAGES))
+    for size, timings in results.items():
+        print(f"{int(size):>12,} " + " ".join(f"{timings[stage]:>15.3f}" for stage in STAGES))
+    if save_baseline:
+        with open(save_baseline, "w") as f:
+            json.dump({"repeats": repeats, "ingest_batch": ingest_batch, "embed_backend": embed_backend,
+                       "stages_ms": results}, f, indent=2)
+        print(f"baseline written to {save_baseline}")
+    if not baseline_path:
+        return True
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline.get("embed_backend") != embed_backend:
+        print(f"{baseline_path} was recorded with the {baseline.get('embed_backend')} backend, not {embed_backend}")
+        return False
+    return compare_to_baseline(results, baseline["stages_ms"], tolerance, min_delta_ms)
+
+# ----------------------------
+# Place extraction
+def legacy_extract_place_names(text: str):
+    """The regex-loop extractor the gazetteer replaced, kept for comparison"""
+    import re
+    place_indicators = ['in ', 'to ', 'from ', 'visit ', 'about ', 'around ']
+    places = []
+    for indicator in place_indicators:
+        pattern = fr'{indicator}([A-Z][a-zA-Z\s]+?)(?:\s|$|,|\.|!|\?)'
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        places.extend([match.strip() for match in matches])
+    capitalized = re.findall(r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b', text)
+    places.extend(capitalized)
+    return list(set(places))
+
+def bench_place_extract(gazetteer_sizes, questions: int):
+    """Questions/sec of the legacy extractor vs the gazetteer as the number of known places grows"""
+    corpus = [f"What are the best {topic} to visit in {place} during {season}?"
+              for topic, place, season in zip(TOPICS * questions, PLACES * questions, SEASONS * questions)][:questions]
+    corpus += list(synthetic_docs(questions, seed=3))
+    start = time.perf_counter()
+    for text in corpus:
+        legacy_extract_place_names(text)
+    legacy_qps = len(corpus) / (time.perf_counter() - start)
+    print(f"{'known places':>12} {'legacy q/s':>11} {'gazetteer q/s':>14} {'legacy places/q':>16} {'gazetteer places/q':>19}")
+    for size in sorted(gazetteer_sizes):
+        gazetteer = traveler_2.load_gazetteer()
+        rng = random.Random(size)
+        while gazetteer.size < size:
+            gazetteer.add(f"{rng.choice(PLACES)} {rng.choice(TOPICS).title()} {rng.randrange(size)}")
+        original, traveler_2.place_gazetteer = traveler_2.place_gazetteer, gazetteer
+        try:
+            start = time.perf_counter()
+            for text in corpus:
+                traveler_2.extract_place_names(text)
+            gazetteer_qps = len(corpus) / (time.perf_counter() - start)
+            legacy_hits = sum(len(legacy_extract_place_names(text)) for text in corpus) / len(corpus)
+            gazetteer_hits = sum(len(traveler_2.extract_place_names(text)) for text in corpus) / len(corpus)
+        finally:
+            traveler_2.place_gazetteer = original
+        print(f"{gazetteer.size:>12,} {legacy_qps:>11.0f} {gazetteer_qps:>14.0f} {legacy_hits:>16.2f} {gazetteer_hits:>19.2f}")
+
+# ----------------------------
+# Shared state backend
+def _state_worker(path: str, worker: int, increments: int, keys: int, items: int):
+    backend = traveler_2.create_state_backend("sqlite", path)
+    counter = backend.unknown_places(capacity=keys)
+    queue = backend.learning_queue()
+    rng = random.Random(worker)
+    start = time.perf_counter()
+    for i in range(increments):
+        counter.add(f"Place{rng.randrange(keys)}")
+        if i < items:
+            queue.push(f"Item{worker}-{i}", rng.randrange(1, 10))
+    popped = []
+    while True:
+        entry = queue.pop()
+        if entry is None:
+            break
+        popped.append(entry[0])
+        queue.done(entry[0])
+    return popped, time.perf_counter() - start
+
+def bench_state_backend(processes: int, increments: int, keys: int, items: int) -> bool:
+    """Hammers one SQLite state file from several processes and checks nothing was lost or handed out twice"""
+    import multiprocessing
+    with tempfile.TemporaryDirectory(prefix="state-backend-") as workdir:
+        path = os.path.join(workdir, "state.db")
+        traveler_2.create_state_backend("sqlite", path)    # create the schema before the workers race for it
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            results = pool.starmap(_state_worker, [(path, w, increments, keys, items) for w in range(processes)])
+        backend = traveler_2.create_state_backend("sqlite", path)
+        counted = sum(count for _, count in backend.unknown_places(keys).top(keys))
+    popped = [place for worker_popped, _ in results for place in worker_popped]
+    slowest = max(elapsed for _, elapsed in results)
+    ops = processes * (increments + 3 * items)
+    counts_ok = counted == processes * increments
+    queue_ok = len(popped) == len(set(popped)) == processes * items
+    print(f"{'processes':>9} {'ops/sec':>9} {'counter total':>14} {'popped once':>12}")
+    print(f"{processes:>9} {ops / slowest:>9.0f} {f'{counted}/{processes * increments}':>14} "
+          f"{f'{len(set(popped))}/{processes * items}':>12}")
+    return counts_ok and queue_ok
+
+# ----------------------------
+# Batch /ask
+def start_fake_gemini(latency: float) -> str:
+    """Serves fake_gemini on a free local port from a daemon thread; returns its base URL"""
+    import socket
+    import threading
+    from aiohttp import web
+    import fake_gemini
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(fake_gemini.create_app(latency=latency, token_delay=0))
+    loop.run_until_complete(runner.setup())
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    loop.run_until_complete(web.SockSite(runner, sock).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+def bench_ask_batch(batch_sizes, latency: float):
+    """Wall time for N questions as N sequential /ask calls vs one /ask/batch call (fake Gemini, answer cache off)"""
+    from fastapi.testclient import TestClient
+    traveler_2.gemini_client.base_url = start_fake_gemini(latency)
+    traveler_2.gemini_client.api_key = traveler_2.gemini_client.api_key or "bench"
+    traveler_2.LEARN_WAIT_TIMEOUT = 0    # measure the answer path, not on-demand learning
+    rng = random.Random(4)
+
+    def questions(count: int):
+        return [f"Which {rng.choice(TOPICS)} should I plan for day {rng.randrange(10_000)} in {rng.choice(PLACES)}?"
+                for _ in range(count)]
+
+    print(f"{'questions':>9} {'sequential s':>13} {'batch s':>8} {'speedup':>8}")
+    with TestClient(traveler_2.app) as client:
+        for size in batch_sizes:
+            traveler_2.answer_cache = traveler_2.SemanticAnswerCache(1, 0, threshold=2.0)
+            start = time.perf_counter()
+            for question in questions(size):
+                client.post("/ask", json={"question": question}).raise_for_status()
+            sequential_s = time.perf_counter() - start
+            start = time.perf_counter()
+            client.post("/ask/batch", json={"questions": questions(size)}).raise_for_status()
+            batch_s = time.perf_counter() - start
+            print(f"{size:>9} {sequential_s:>13.2f} {batch_s:>8.2f} {sequential_s / batch_s:>7.1f}x")
+
+# ----------------------------
+# Embedding backends
+def bench_embed_backends(backends, texts: int, batch_size: int):
+    """Startup (load + first encode) time, throughput and agreement with the torch vectors per backend"""
+    corpus = list(synthetic_docs(texts, seed=2))
+    reference = None
+    print(f"{'backend':>8} {'startup s':>10} {'texts/sec':>10} {'min cos vs torch':>17}")
+    for name in backends:
+        backend = create_embedding_backend(name)
+        try:
+            start = time.perf_counter()
+            backend.warmup()
+            startup_s = time.perf_counter() - start
+        except Exception as e:
+            print(f"{name:>8} unavailable: {e}")
+            continue
+        start = time.perf_counter()
+        vectors = np.concatenate([backend.encode(corpus[i:i + batch_size]) for i in range(0, len(corpus), batch_size)])
+        throughput = len(corpus) / (time.perf_counter() - start)
+        if reference is None and name == "torch":
+            reference = vectors
+        agreement = "-"
+        if reference is not None:
+            cos = np.sum(vectors * reference, axis=1) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1))
+            agreement = f"{cos.min():.4f}"
+        print(f"{name:>8} {startup_s:>10.2f} {throughput:>10.1f} {agreement:>17}")
+
+# ----------------------------
+# Embedding micro-batching
+async def _drive_encoders(encode, concurrency: int, requests_per_caller: int) -> float:
+    questions = list(synthetic_docs(concurrency * requests_per_caller, seed=1))
+
+    async def caller(offset: int):
+        for i in range(requests_per_caller):
+            await encode([questions[offset * requests_per_caller + i]])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(c) for c in range(concurrency)))
+    return concurrency * requests_per_caller / (time.perf_counter() - start)
+
+def bench_embed_batching(concurrency_levels, requests_per_caller: int, max_batch: int, max_wait_ms: float, workers: int):
+    """Requests/sec of one-query encodes: per-call executor path vs the coalescing batcher"""
+    async def per_call(texts):
+        return await asyncio.get_running_loop().run_in_executor(embed_executor, embedder.encode, texts)
+
+    async def run(concurrency: int):
+        batcher = EmbeddingBatcher(max_batch, max_wait_ms, workers)
+        await per_call(["warmup"])
+        baseline = await _drive_encoders(per_call, concurrency, requests_per_caller)
+        batched = await _drive_encoders(batcher.encode, concurrency, requests_per_caller)
+        return baseline, batched, batcher.stats()["avg_batch_size"]
+
+    print(f"{'concurrency':>11} {'per-call req/s':>15} {'batched req/s':>14} {'avg batch':>10}")
+    for concurrency in concurrency_levels:
+        baseline, batched, avg_batch = asyncio.run(run(concurrency))
+        print(f"{concurrency:>11} {baseline:>15.1f} {batched:>14.1f} {avg_batch:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the travel agent backend")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    hs = sub.add_parser("hybrid-search", help="Qdrant upsert and hybrid (dense + sparse, RRF) query latency vs corpus size")
+    hs.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    hs.add_argument("--batch-size", type=int, default=5)
+    hs.add_argument("--repeats", type=int, default=20)
+    hs.add_argument("--upsert-batch", type=int, default=1024)
+    st = sub.add_parser("stages", help="per-stage (encode, keyword vectors, dense/keyword/hybrid search, "
+                                       "context packing, ingest) latency vs corpus size, checked against a stored baseline")
+    st.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                    help="corpus sizes; 1M needs QDRANT_URL pointing at a Qdrant server")
+    st.add_argument("--repeats", type=int, default=20)
+    st.add_argument("--ingest-batch", type=int, default=5)
+    st.add_argument("--upsert-batch", type=int, default=1024)
+    st.add_argument("--baseline", default=STAGE_BASELINE,
+                    help="baseline JSON to compare against; exits non-zero on a regression")
+    st.add_argument("--no-baseline", dest="baseline", action="store_const", const=None, help="skip the comparison")
+    st.add_argument("--save-baseline", help="write this run's timings as the new baseline")
+    st.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown per stage")
+    st.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    st.add_argument("--embed-backend", default="hash", choices=list(EMBEDDING_BACKENDS),
+                    help="backend for the encode and ingest stages; hash needs no model")
+    pe = sub.add_parser("place-extract", help="place extraction throughput: legacy regex loop vs gazetteer")
+    pe.add_argument("--gazetteer-sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    pe.add_argument("--questions", type=int, default=5000)
+    sb = sub.add_parser("state-backend", help="multi-process consistency and throughput of the SQLite state backend")
+    sb.add_argument("--processes", type=int, default=4)
+    sb.add_argument("--increments", type=int, default=2000)
+    sb.add_argument("--keys", type=int, default=200)
+    sb.add_argument("--items", type=int, default=500)
+    ab = sub.add_parser("ask-batch", help="N sequential /ask calls vs one /ask/batch against a fake Gemini")
+    ab.add_argument("--batch-sizes", type=int, nargs="+", default=[5, 20, 50])
+    ab.add_argument("--latency", type=float, default=0.3, help="fake Gemini seconds per generation")
+    eb = sub.add_parser("embed-batching", help="encode requests/sec with and without micro-batching")
+    eb.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    eb.add_argument("--requests-per-caller", type=int, default=20)
+    eb.add_argument("--max-batch", type=int, default=64)
+    eb.add_argument("--max-wait-ms", type=float, default=5)
+    eb.add_argument("--workers", type=int, default=2)
+    be = sub.add_parser("embed-backends", help="startup time and encode throughput per embedding backend")
+    be.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=list(EMBEDDING_BACKENDS))
+    be.add_argument("--texts", type=int, default=2000)
+    be.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.bench == "hybrid-search":
+        bench_hybrid_search(args.sizes, args.batch_size, args.repeats, args.upsert_batch)
+    elif args.bench == "stages":
+        if not bench_stages(args.sizes, args.repeats, args.ingest_batch, args.upsert_batch, args.baseline,
+                            args.save_baseline, args.tolerance, args.min_delta_ms, args.embed_backend):
+            raise SystemExit("stage latency regressed past the baseline")
+    elif args.bench == "place-extract":
+        bench_place_extract(args.gazetteer_sizes, args.questions)
+    elif args.bench == "state-backend":
+        if not bench_state_backend(args.processes, args.increments, args.keys, args.items):
+            raise SystemExit("state backend lost or duplicated updates across processes")
+    elif args.bench == "ask-batch":
+        bench_ask_batch(args.batch_sizes, args.latency)
+    elif args.bench == "embed-backends":
+        bench_embed_backends(args.backends, args.texts, args.batch_size)
+    elif args.bench == "embed-batching":
+        bench_embed_batching(args.concurrency, args.requests_per_caller, args.max_batch, args.max_wait_ms, args.workers)
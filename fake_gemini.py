@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+def _payload(text: str) -> dict:
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]}
+
+def _answer_for(body: dict, words: int) -> list:
+    prompt = " ".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+    question = prompt.split("Question:")[-1].split("\n")[0].strip() or "your trip"
+    filler = ["Plan", "ahead,", "travel", "light,", "and", "ask", "locals", "for", "their", "favourite", "spots."]
+    return [f"Regarding {question}:"] + [filler[i % len(filler)] for i in range(words)]
+
+def create_app(latency: float = 0.5, token_delay: float = 0.02, error_rate: float = 0.0,
+               error_status: int = 503, words: int = 40) -> web.Application:
+    """Local stand-in for the Gemini REST API (generateContent / streamGenerateContent?alt=sse)"""
+    app = web.Application()
+    app["stats"] = {"requests": 0, "errors": 0}
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        model_method = request.match_info["model_method"]
+        _, _, method = model_method.partition(":")
+        app["stats"]["requests"] += 1
+        body = await request.json()
+        if random.random() < error_rate:
+            app["stats"]["errors"] += 1
+            return web.json_response({"error": {"code": error_status, "message": "fake upstream error"}}, status=error_status)
+        tokens = _answer_for(body, words)
+        if method == "generateContent":
+            await asyncio.sleep(latency + token_delay * len(tokens))
+            return web.json_response(_payload(" ".join(tokens)))
+        if method == "streamGenerateContent":
+            await asyncio.sleep(latency)
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for token in tokens:
+                await response.write(f"data: {json.dumps(_payload(token + ' '))}\r\n\r\n".encode())
+                await asyncio.sleep(token_delay)
+            await response.write_eof()
+            return response
+        return web.json_response({"error": {"code": 404, "message": f"unknown method {method}"}}, status=404)
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(app["stats"])
+
+    app.router.add_post("/v1beta/models/{model_method}", handle)
+    app.router.add_get("/stats", stats)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Gemini server; point GEMINI_API_BASE at it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--words", type=int, default=40)
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency, args.token_delay, args.error_rate, args.error_status, args.words),
+                host=args.host, port=args.port)
@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import aiohttp
+
+# Boots traveler_2 under uvicorn against in-memory Qdrant and fake_gemini, drives a weighted traffic mix
+# and writes the results as JSON so runs can be compared over time.
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLACES = ["Paris", "Tokyo", "Rome", "Bali", "Dubai", "Iceland", "Lisbon", "Kyoto", "Cusco", "Hanoi"]
+TOPICS = ["museums", "beaches", "temples", "street food", "hiking", "nightlife", "markets", "festivals"]
+OPERATIONS = ("ask", "contribute", "learn")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def rss_mb(pid: int):
+    """Current and peak resident set size of `pid` from /proc; None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Stack:
+    """fake_gemini and the app as child processes, so the load generator does not share their event loop"""
+
+    def __init__(self, gemini_latency: float, token_delay: float, gemini_error_rate: float, env: dict):
+        self.gemini_port = free_port()
+        self.app_port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.app_port}"
+        self.workdir = tempfile.TemporaryDirectory(prefix="travel-loadtest-")
+        self.log = open(os.path.join(self.workdir.name, "server.log"), "w")
+        self.gemini_args = ["--latency", str(gemini_latency), "--token-delay", str(token_delay),
+                            "--error-rate", str(gemini_error_rate)]
+        self.env = {
+            **os.environ,
+            "QDRANT_URL": ":memory:",
+            "GEMINI_API_BASE": f"http://127.0.0.1:{self.gemini_port}",
+            "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "loadtest"),
+            "SNAPSHOT_DIR": os.path.join(self.workdir.name, "snapshots"),
+            "SNAPSHOT_INTERVAL": "0",
+            **env,
+        }
+        self.gemini = self.app = None
+
+    async def start(self, timeout: float):
+        self.gemini = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_gemini.py"),
+                                        "--port", str(self.gemini_port)] + self.gemini_args,
+                                       stdout=self.log, stderr=subprocess.STDOUT)
+        self.app = subprocess.Popen([sys.executable, "-m", "uvicorn", "traveler_2:app", "--host", "127.0.0.1",
+                                     "--port", str(self.app_port), "--log-level", "warning"],
+                                    cwd=HERE, env=self.env, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() < deadline:
+                if self.app.poll() is not None:
+                    break
+                try:
+                    async with session.get(f"{self.base_url}/health") as response:
+                        if response.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"app did not become healthy within {timeout:.0f}s; see {self.log.name}")
+
+    def stop(self):
+        for process in (self.app, self.gemini):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        self.log.close()
+        self.workdir.cleanup()
+
+class TrafficMix:
+    """Weighted ask / contribute / learn requests; `learn` asks about unseen places so they reach the learning queue"""
+
+    def __init__(self, weights: dict, unknown_places: int, seed: int):
+        self.rng = random.Random(seed)
+        self.operations = [op for op in OPERATIONS if weights.get(op, 0) > 0]
+        self.weights = [weights[op] for op in self.operations]
+        self.unknown_places = [f"Loadtown{i}" for i in range(unknown_places)]
+
+    def next(self):
+        op = self.rng.choices(self.operations, self.weights)[0]
+        rng = self.rng
+        if op == "ask":
+            return op, "/ask", {"question": f"Which {rng.choice(TOPICS)} should I see in {rng.choice(PLACES)} "
+                                            f"on day {rng.randrange(1000)}?"}
+        if op == "contribute":
+            place = rng.choice(PLACES)
+            return op, "/contribute", {"place": place, "information": f"{place} has great {rng.choice(TOPICS)} "
+                                                                     f"near stop {rng.randrange(100_000)}."}
+        return op, "/ask", {"question": f"What is worth seeing in {rng.choice(self.unknown_places)}?"}
+
+async def drive(base_url: str, mix: TrafficMix, concurrency: int, duration: float, warmup: float, timeout: float):
+    """Closed-loop load: `concurrency` callers each send their next request as soon as the previous one returns"""
+    samples = {op: [] for op in OPERATIONS}
+    errors = {op: 0 for op in OPERATIONS}
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def caller(session: aiohttp.ClientSession):
+        while time.monotonic() < stop_at:
+            op, path, body = mix.next()
+            sent = time.monotonic()
+            ok = False
+            try:
+                async with session.post(f"{base_url}{path}", json=body) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            if sent >= measure_from:
+                samples[op].append(time.monotonic() - sent)
+                errors[op] += not ok
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        await asyncio.gather(*(caller(session) for _ in range(concurrency)))
+    return samples, errors, time.monotonic() - measure_from
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+async def run(args) -> dict:
+    weights = dict(zip(OPERATIONS, (args.ask, args.contribute, args.learn)))
+    stack = Stack(args.gemini_latency, args.token_delay, args.gemini_error_rate, dict(args.env))
+    await stack.start(args.startup_timeout)
+    try:
+        rss_start = rss_mb(stack.app.pid)
+        samples, errors, elapsed = await drive(stack.base_url, TrafficMix(weights, args.unknown_places, args.seed),
+                                               args.concurrency, args.duration, args.warmup, args.request_timeout)
+        rss_end = rss_mb(stack.app.pid)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{stack.base_url}/system-status") as response:
+                status = await response.json() if response.status == 200 else {}
+    finally:
+        stack.stop()
+    everything = [latency for op in OPERATIONS for latency in samples[op]]
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "config": {
+            "concurrency": args.concurrency, "duration_sec": args.duration, "warmup_sec": args.warmup,
+            "mix": weights, "unknown_places": args.unknown_places, "gemini_latency_sec": args.gemini_latency,
+            "token_delay_sec": args.token_delay, "gemini_error_rate": args.gemini_error_rate,
+            "env": dict(args.env), "seed": args.seed,
+        },
+        "overall": summarize(everything, sum(errors.values()), elapsed),
+        "operations": {op: summarize(samples[op], errors[op], elapsed) for op in OPERATIONS if samples[op]},
+        "rss_mb": {
+            "start": round(rss_start[0], 1) if rss_start else None,
+            "end": round(rss_end[0], 1) if rss_end else None,
+            "peak": round(rss_end[1], 1) if rss_end else None,
+        },
+        "learning": status.get("learning", {}),
+    }
+
+def print_report(result: dict, previous: dict = None):
+    print(f"{'operation':>10} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [("overall", result["overall"])] + list(result["operations"].items())
+    for name, row in rows:
+        print(f"{name:>10} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+    rss = result["rss_mb"]
+    if rss["end"] is not None:
+        print(f"server RSS: {rss['start']} MB at start, {rss['end']} MB at end, {rss['peak']} MB peak")
+    if previous:
+        before, after = previous["overall"], result["overall"]
+        print(f"vs {previous.get('timestamp')} ({previous.get('git_revision')}): "
+              + ", ".join(f"{key} {before[key]} -> {after[key]}" for key in ("rps", "p50_ms", "p95_ms", "p99_ms")))
+
+def env_pair(text: str):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    return key, value
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /ask and /contribute against in-memory Qdrant and a fake Gemini")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of traffic before measuring")
+    parser.add_argument("--ask", type=float, default=8, help="relative weight of /ask about well-known places")
+    parser.add_argument("--contribute", type=float, default=1, help="relative weight of /contribute")
+    parser.add_argument("--learn", type=float, default=1, help="relative weight of /ask about unseen places")
+    parser.add_argument("--unknown-places", type=int, default=50, help="pool of unseen places the learn traffic draws from")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="fake Gemini seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="fake Gemini seconds between tokens")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--request-timeout", type=float, default=60)
+    parser.add_argument("--startup-timeout", type=float, default=180, help="seconds to wait for the model load")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", type=env_pair, action="append", default=[], metavar="KEY=VALUE",
+                        help="extra app environment, e.g. --env STATE_BACKEND=sqlite (repeatable)")
+    parser.add_argument("--output", default="loadtest-results", help="directory the JSON result is written to")
+    parser.add_argument("--compare", help="earlier result JSON to print deltas against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(result, previous)
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {path}")
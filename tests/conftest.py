@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The app reads its configuration at import time: keep tests off real Qdrant and the working directory
+os.environ.setdefault("QDRANT_URL", ":memory:")
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "travel-test-snapshots"))
+os.environ.setdefault("STATE_BACKEND", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+import asyncio
+
+import traveler_2
+
+def test_stream_returns_before_retrieval_and_reports_its_failure(monkeypatch):
+    started = []
+
+    async def slow_failing_context(question):
+        started.append(question)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("qdrant down")
+
+    monkeypatch.setattr(traveler_2, "prepare_answer_context", slow_failing_context)
+
+    async def run():
+        response = await traveler_2.intelligent_ask_stream(traveler_2.QuestionInput(question="Paris?"))
+        # The learning wait happens inside the stream, after the headers are sent
+        assert started == []
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(run())
+    assert started == ["Paris?"]
+    assert len(chunks) == 1 and chunks[0].startswith("event: error\n")
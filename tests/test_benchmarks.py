@@ -0,0 +1,27 @@
+import json
+import os
+
+import pytest
+
+import benchmarks
+
+def test_every_stage_is_timed_and_in_the_baseline():
+    results = benchmarks.run_stages([300], repeats=2, ingest_batch=5, upsert_batch=1024)
+    assert set(results["300"]) == set(benchmarks.STAGES)
+    with open(benchmarks.STAGE_BASELINE) as f:
+        baseline = json.load(f)
+    assert baseline["embed_backend"] == "hash"
+    for timings in baseline["stages_ms"].values():
+        assert set(timings) == set(benchmarks.STAGES)
+
+def test_compare_fails_on_a_stage_missing_from_the_baseline():
+    results = {"1000": {"encode": 1.0, "ingest": 1.0}}
+    assert not benchmarks.compare_to_baseline(results, {"1000": {"encode": 1.0}}, 0.25, 0.5)
+    assert benchmarks.compare_to_baseline(results, {"1000": {"encode": 1.0, "ingest": 1.0}}, 0.25, 0.5)
+
+@pytest.mark.skipif(os.getenv("BENCH_BASELINE_CHECK") != "1",
+                    reason="wall-clock check; set BENCH_BASELINE_CHECK=1 on the machine that recorded the baseline")
+def test_stage_latency_stays_within_baseline():
+    # Loose bounds: this catches a stage that stops scaling, not run-to-run jitter on a shared machine
+    assert benchmarks.bench_stages([1_000], repeats=10, ingest_batch=5, upsert_batch=1024,
+                                   baseline_path=benchmarks.STAGE_BASELINE, tolerance=1.0, min_delta_ms=2.0)
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import numpy as np
+
+import traveler_2
+
+def test_callers_do_not_share_the_batch_array(monkeypatch):
+    monkeypatch.setattr(traveler_2.embedder, "encode",
+                        lambda texts: np.ones((len(texts), traveler_2.EMBEDDING_DIM), dtype=np.float32))
+
+    async def run():
+        batcher = traveler_2.EmbeddingBatcher(max_batch=64, max_wait_ms=20, workers=1)
+        results = await asyncio.gather(batcher.encode(["a"]), batcher.encode(["b", "c"]), batcher.encode(["d"] * 40))
+        return results, batcher.batches
+
+    results, batches = asyncio.run(run())
+    assert batches == 1
+    assert [len(vectors) for vectors in results] == [1, 2, 40]
+    assert all(vectors.base is None for vectors in results)    # owns its memory, not a view of the batch
+
+def test_query_encodes_do_not_queue_behind_bulk_encodes(monkeypatch):
+    def encode(texts):
+        time.sleep(0.5 if len(texts) >= 512 else 0.01)
+        return np.ones((len(texts), traveler_2.EMBEDDING_DIM), dtype=np.float32)
+
+    monkeypatch.setattr(traveler_2.embedder, "encode", encode)
+    monkeypatch.setattr(traveler_2, "embedding_batcher", traveler_2.EmbeddingBatcher(64, 5, 2))
+
+    async def run():
+        bulk = [asyncio.create_task(traveler_2.encode_bulk_texts(["doc"] * 512)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await traveler_2.encode_texts(["cafes in Paris"])
+        waited = time.monotonic() - started
+        await asyncio.gather(*bulk)
+        return waited
+
+    assert asyncio.run(run()) < 0.3
@@ -0,0 +1,16 @@
+import traveler_2
+
+def test_acronyms_and_common_words_only_match_in_exact_case():
+    assert traveler_2.extract_place_names("Beaches near Playa de la Concha") == ["Playa"]
+    assert traveler_2.extract_place_names("Where to eat turkey in Istanbul") == ["Istanbul"]
+    assert traveler_2.extract_place_names("Flights from LA to the UK") == ["Los Angeles", "United Kingdom"]
+    assert traveler_2.extract_place_names("Visiting Turkey and the UAE") == ["Turkey", "United Arab Emirates"]
+
+def test_places_match_case_insensitively_otherwise():
+    assert traveler_2.extract_place_names("best pizza in new york") == ["New York City"]
+    assert traveler_2.extract_place_names("Cafés in PARIS") == ["Paris"]
+
+def test_explicit_place_fields_canonicalize_in_any_case():
+    assert traveler_2.canonical_place("uk") == "United Kingdom"
+    assert traveler_2.canonical_place("turkey") == "Turkey"
+    assert "Turkey" in traveler_2.place_gazetteer
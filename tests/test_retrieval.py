@@ -0,0 +1,49 @@
+import asyncio
+
+import numpy as np
+
+import traveler_2
+
+def unit(rng):
+    vector = rng.standard_normal(traveler_2.EMBEDDING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_places_are_stored_under_their_canonical_name():
+    assert traveler_2.canonical_place("paris") == "Paris"
+    assert traveler_2.canonical_place("New York") == "New York City"
+    assert traveler_2.canonical_place("  Atlantis   Bay ") == "Atlantis Bay"
+
+def test_place_documents_rank_first_in_a_single_round_trip(monkeypatch):
+    rng = np.random.default_rng(7)
+    query_vec = unit(rng)
+
+    async def run():
+        await traveler_2.setup_qdrant_collection()
+        client = traveler_2.qdrant_client
+        # Generic documents close to the query, and one Paris document further away
+        points = [traveler_2.make_point(f"general travel tip {i}", (query_vec + 0.2 * unit(rng)).tolist(), None,
+                                        "test", traveler_2.doc_point_id(f"general travel tip {i}", None))
+                  for i in range(20)]
+        paris = traveler_2.canonical_place("paris")
+        paris_doc = "Cafés along the Seine"
+        points.append(traveler_2.make_point(paris_doc, (query_vec + 0.6 * unit(rng)).tolist(), paris, "test",
+                                            traveler_2.doc_point_id(paris_doc, paris)))
+        await client.upsert(collection_name=traveler_2.COLLECTION_NAME, points=points)
+
+        calls = []
+        original = client.query_batch_points
+
+        async def counting(*args, **kwargs):
+            calls.append(kwargs)
+            return await original(*args, **kwargs)
+
+        monkeypatch.setattr(client, "query_batch_points", counting)
+        docs, _, _, doc_places, _ = (await traveler_2.retrieve_many(["cafes in Paris"], [query_vec.tolist()],
+                                                                    [["Paris"]]))[0]
+        return docs, doc_places, len(calls)
+
+    docs, doc_places, calls = asyncio.run(run())
+    assert calls == 1
+    assert docs[0] == "Cafés along the Seine"
+    assert len(docs) == 5
+    assert "Paris" in doc_places
@@ -0,0 +1,20 @@
+import time
+
+import traveler_2
+
+def test_reading_a_session_keeps_it_alive():
+    store = traveler_2.SessionStore(max_sessions=10, idle_ttl=0.2, max_turns=5)
+    store.append("read", "q1", "a1")
+    store.append("idle", "q2", "a2")
+    time.sleep(0.15)
+    assert store.turns("read") == [("q1", "a1")]
+    time.sleep(0.1)
+    # "idle" expired; "read" was touched by the read above and must survive the expiry scan
+    assert store.turns("idle") == []
+    assert store.turns("read") == [("q1", "a1")]
+    assert len(store) == 1
+
+def test_one_off_questions_do_not_create_sessions():
+    assert traveler_2.request_session_id(traveler_2.QuestionInput(question="Paris?")) is None
+    assert traveler_2.request_session_id(traveler_2.QuestionInput(question="Paris?", session_id="abc")) == "abc"
+    assert traveler_2.request_session_id(traveler_2.QuestionInput(question="Paris?", start_session=True))
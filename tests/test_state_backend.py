@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import benchmarks
+import traveler_2
+
+def test_sqlite_backend_is_consistent_across_processes():
+    # Every increment is counted and every queued item is popped by exactly one process
+    assert benchmarks.bench_state_backend(processes=4, increments=300, keys=50, items=100)
+
+def test_sqlite_calls_do_not_block_the_event_loop(tmp_path):
+    path = os.path.join(tmp_path, "state.db")
+    backend = traveler_2.create_state_backend("sqlite", path)
+    counter = backend.unknown_places(capacity=10)
+
+    # Another process holds the write lock for a while
+    other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.5, lambda: other.execute("COMMIT")).start()
+
+    async def run():
+        ticks = 0
+        write = asyncio.create_task(backend.run(counter.add, "Paris"))
+        while not write.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return await write, ticks
+
+    started = time.monotonic()
+    count, ticks = asyncio.run(run())
+    assert count == 1
+    assert time.monotonic() - started >= 0.4
+    assert ticks >= 20    # the loop kept running while the write waited for the lock
+    other.close()
+
+def test_requeued_place_survives_the_final_done(tmp_path):
+    backend = traveler_2.create_state_backend("sqlite", os.path.join(tmp_path, "state.db"))
+    queue = backend.learning_queue()
+    queue.push("Paris", 3)
+    assert queue.pop()[0] == "Paris"
+    # What LearningWorkerPool._run does when cancelled: hand the place back, then release the claim
+    queue.done("Paris")
+    queue.push("Paris", 3)
+    queue.done("Paris")
+    assert "Paris" in queue
+
+def test_push_from_the_state_thread_wakes_the_waiting_worker(tmp_path):
+    backend = traveler_2.create_state_backend("sqlite", os.path.join(tmp_path, "state.db"))
+    queue = backend.learning_queue()
+
+    async def run():
+        asyncio.get_running_loop().set_debug(True)    # debug mode rejects cross-thread Event.set
+        waiter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0.05)
+        await backend.run(queue.push, "Paris", 2)
+        return await asyncio.wait_for(waiter, traveler_2.STATE_POLL_INTERVAL / 2)
+
+    assert asyncio.run(run())[0] == "Paris"
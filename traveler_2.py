@@ -1,30 +1,104 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, AsyncIterator
 import logging
 import os
 import asyncio
 import aiohttp
+import re
+import time
+import hashlib
+import random
+import bisect
+import csv
+import sqlite3
+import heapq
+import itertools
+import unicodedata
+import resource
+import sys
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque, Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 import json
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (Distance, VectorParams, PointStruct, SparseVector, SparseVectorParams, Modifier,
+                                  Prefetch, FusionQuery, Fusion, Filter, FieldCondition, MatchAny, PayloadSchemaType,
+                                  QueryRequest, RrfQuery, Rrf)
 import uuid
 import requests
 import traceback
-import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+GAZETTEER_FILE = os.getenv("GAZETTEER_FILE")
+UNKNOWN_PLACES_CAPACITY = int(os.getenv("UNKNOWN_PLACES_CAPACITY", "1000"))
+STATUS_TOP_K = int(os.getenv("STATUS_TOP_K", "20"))
+RECENT_CONTRIBUTIONS = int(os.getenv("RECENT_CONTRIBUTIONS", "200"))
+CONTRIBUTION_LOG = os.getenv("CONTRIBUTION_LOG", os.path.join(SNAPSHOT_DIR, "contributions.jsonl"))   # "" disables
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")     # memory | sqlite (shared by every worker on the host)
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join(SNAPSHOT_DIR, "state.db"))
+STATE_POLL_INTERVAL = float(os.getenv("STATE_POLL_INTERVAL", "1"))
+STATE_BUSY_TIMEOUT = float(os.getenv("STATE_BUSY_TIMEOUT", "5"))   # seconds a SQLite write waits for another process
+LEARN_CLAIM_TIMEOUT = float(os.getenv("LEARN_CLAIM_TIMEOUT", "600"))   # a claim older than this is considered abandoned
+LEARN_CONCURRENCY = int(os.getenv("LEARN_CONCURRENCY", "4"))
+LEARN_MAX_RETRIES = int(os.getenv("LEARN_MAX_RETRIES", "2"))
+LEARN_RETRY_BACKOFF = float(os.getenv("LEARN_RETRY_BACKOFF", "5"))
+LEARN_WAIT_TIMEOUT = float(os.getenv("LEARN_WAIT_TIMEOUT", "2"))   # seconds /ask waits for on-demand learning, 0 = never
+LEARN_WEB_RATE = float(os.getenv("LEARN_WEB_RATE", "1"))      # web lookups per second, 0 = unlimited
+LEARN_WEB_BURST = int(os.getenv("LEARN_WEB_BURST", "5"))
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "600"))
+BULK_INGEST_DIR = os.path.realpath(os.getenv("BULK_INGEST_DIR", "data"))
+BULK_JOBS_KEPT = int(os.getenv("BULK_JOBS_KEPT", "100"))   # finished /ingest/bulk jobs whose status stays queryable
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "512"))
+BULK_PARALLEL_UPSERTS = int(os.getenv("BULK_PARALLEL_UPSERTS", "4"))
+BULK_EMBED_WORKERS = int(os.getenv("BULK_EMBED_WORKERS", "1"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "50"))
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", "8"))
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "20"))       # per attempt / between stream chunks
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", "45"))     # whole call, retries included
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_RESET = float(os.getenv("GEMINI_BREAKER_RESET", "30"))
+KEYWORD_MIN_SCORE = float(os.getenv("KEYWORD_MIN_SCORE", "1.0"))
+RRF_K = 60   # Qdrant's default reciprocal rank fusion constant
+BM25_AVG_DOC_LEN = float(os.getenv("BM25_AVG_DOC_LEN", "20"))   # typical tokens per doc, for length normalisation
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")   # Local Docker
+COLLECTION_NAME = "travel_knowledge"
+EMBEDDING_DIM = 384
+DOC_ID_NAMESPACE = uuid.UUID("6f1d7a52-3c0b-4d8e-9a57-2b6f0e4c9d13")
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")     # torch | onnx | int8 | hash
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE")           # e.g. onnx/model_qint8_avx512_vnni.onnx
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "2"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "21600"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))                # sessions kept; least recently used go first
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))     # seconds before an idle session expires
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "20"))       # turns stored per session
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "400"))  # prompt tokens spent on earlier turns
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))   # prompt tokens spent on retrieved docs
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))      # 1 = pure relevance, 0 = pure diversity
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.92"))  # cosine treated as a repeat
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
 
 app = FastAPI(
     title="Intelligent AI Traveling Agent",
@@ -43,106 +117,1172 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ----------------------------
+# Metrics
+# Hot paths only record stage timings and a few counters; everything else is read from the
+# components' own stats when /metrics is scraped.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """Prometheus-style histogram: per-bucket counts (cumulated on render), sum and count"""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+class Metrics:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[tuple, Histogram] = {}
+        self.counters: Dict[tuple, float] = defaultdict(float)
+        self.help: Dict[str, tuple] = {}
+
+    def describe(self, name: str, kind: str, text: str):
+        self.help[name] = (kind, text)
+
+    def observe(self, name: str, value: float, **labels):
+        if self.enabled:
+            key = (name, tuple(sorted(labels.items())))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        if self.enabled:
+            self.counters[(name, tuple(sorted(labels.items())))] += amount
+
+    @contextmanager
+    def time(self, stage: str):
+        """Times a pipeline stage into travel_stage_seconds and counts it in travel_stage_errors_total if it raises"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("travel_stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe("travel_stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def render(self, extra: List[tuple]) -> str:
+        """Prometheus text format; `extra` holds (name, kind, labels, value) samples collected at scrape time"""
+        families: Dict[str, List[str]] = defaultdict(list)
+        kinds: Dict[str, str] = {}
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            kinds[name] = "histogram"
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                families[name].append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+            families[name].append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+            families[name].append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        samples = [(name, "counter", dict(labels), value) for (name, labels), value in sorted(self.counters.items())]
+        for name, kind, labels, value in samples + extra:
+            kinds.setdefault(name, kind)
+            families[name].append(f"{name}{format_labels(tuple(sorted(labels.items())))} {value}")
+        lines = []
+        for name, family in families.items():
+            kind, text = self.help.get(name, (kinds[name], name))
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"] + family
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics(METRICS_ENABLED)
+for _name, _kind, _text in [
+    ("travel_stage_seconds", "histogram", "Latency of each /ask pipeline stage"),
+    ("travel_stage_errors_total", "counter", "Exceptions raised inside a pipeline stage"),
+    ("travel_request_seconds", "histogram", "HTTP request latency until the response starts"),
+    ("travel_requests_total", "counter", "HTTP requests by route and status"),
+    ("travel_answers_total", "counter", "Answered questions by retrieval confidence"),
+    ("travel_cache_lookups_total", "counter", "Cache lookups by cache and result"),
+    ("travel_learning_events_total", "counter", "Learning lookups by outcome"),
+    ("travel_gemini_calls_total", "counter", "Gemini calls, failures and retries"),
+    ("travel_embedding_batches_total", "counter", "Encode batches run by the embedding batcher"),
+    ("travel_corpus_points", "gauge", "Approximate number of points in the knowledge collection"),
+    ("travel_learning_queue_depth", "gauge", "Places waiting to be learned"),
+    ("travel_learning_in_flight", "gauge", "Learning lookups currently running"),
+    ("travel_gemini_in_flight", "gauge", "Gemini calls currently running"),
+    ("travel_gemini_circuit_open", "gauge", "1 while the Gemini circuit breaker is open"),
+    ("travel_unknown_places_tracked", "gauge", "Unknown places held by the heavy-hitter sketch"),
+    ("travel_sessions_active", "gauge", "Conversation sessions currently held"),
+    ("travel_prompt_tokens_saved_total", "counter", "Estimated context tokens context packing kept out of Gemini prompts"),
+]:
+    metrics.describe(_name, _kind, _text)
+
 # Embeddings model
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+class EmbeddingBackend(ABC):
+    """Sentence encoder that loads on first use (or on warmup) and returns float32 EMBEDDING_DIM vectors"""
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = None
+        self.load_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _load(self):
+        """Builds the underlying model; called once, under the lock"""
+
+    def _get_model(self):
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    started = time.monotonic()
+                    model = self._load()
+                    dim = model.get_sentence_embedding_dimension()
+                    if dim != EMBEDDING_DIM:
+                        raise RuntimeError(f"{self.name} backend produced {dim}-dim vectors, expected {EMBEDDING_DIM}")
+                    self.model = model
+                    self.load_seconds = round(time.monotonic() - started, 2)
+                    logger.info(f"Loaded {self.name} embedding backend for {self.model_name} in {self.load_seconds}s")
+        return self.model
+
+    def encode(self, texts: List[str]):
+        return self._get_model().encode(texts, convert_to_numpy=True)
+
+    def warmup(self):
+        self.encode(["warmup"])
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "model": self.model_name, "loaded": self.model is not None,
+                "load_seconds": self.load_seconds}
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name, device="cpu")
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime via sentence-transformers; EMBED_ONNX_FILE selects e.g. a pre-quantized int8 export"""
+    name = "onnx"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        model_kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else None
+        try:
+            return SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+        except ImportError as e:
+            raise RuntimeError("The onnx backend needs `pip install sentence-transformers[onnx]`") from e
+
+class Int8Backend(EmbeddingBackend):
+    """Torch model with dynamically int8-quantized Linear layers; no extra dependencies"""
+    name = "int8"
+
+    def _load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(self.model_name, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class HashingEncoder:
+    """Signed feature hashing of the BM25 tokens, L2-normalized; deterministic, with no model to load"""
+    def get_sentence_embedding_dimension(self) -> int:
+        return EMBEDDING_DIM
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True):
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in zip(vectors, texts):
+            for term in tokenize(text):
+                bucket = term_id(term)
+                row[bucket % EMBEDDING_DIM] += 1.0 if bucket & 0x80000000 else -1.0
+            norm = np.linalg.norm(row)
+            if norm:
+                row /= norm
+            else:
+                row[0] = 1.0    # cosine distance needs a non-zero vector
+        return vectors
+
+class HashBackend(EmbeddingBackend):
+    """Stand-in for tests, benchmarks and load tests: stable timings and vectors, but only word-overlap similarity"""
+    name = "hash"
+
+    def _load(self):
+        return HashingEncoder()
+
+EMBEDDING_BACKENDS = {backend.name: backend for backend in (TorchBackend, OnnxBackend, Int8Backend, HashBackend)}
+
+def create_embedding_backend(name: str, model_name: str = EMBED_MODEL) -> EmbeddingBackend:
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBED_BACKEND '{name}', expected one of {sorted(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[name](model_name)
+
+embedder = create_embedding_backend(EMBED_BACKEND)
+# Encoding is CPU-bound, so it runs on a small dedicated pool instead of the event loop
+embed_executor = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="embed")
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode calls into one batched embedder.encode and fans the vectors back out"""
+    def __init__(self, max_batch: int, max_wait_ms: float, workers: int):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.queue: Optional[asyncio.Queue] = None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.texts = 0
+
+    async def encode(self, texts: List[str]):
+        if self.dispatcher is None or self.dispatcher.done():
+            self.queue = asyncio.Queue()
+            self.dispatcher = asyncio.create_task(self._dispatch())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            pending = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            # While every worker is busy the queue keeps filling, so batches grow with load
+            await slots.acquire()
+            count = len(pending[0][0])
+            while count < self.max_batch:
+                if self.queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self.queue.get_nowait()
+                pending.append(item)
+                count += len(item[0])
+            asyncio.create_task(self._run_batch(pending, slots))
+
+    async def _run_batch(self, pending: list, slots: asyncio.Semaphore):
+        all_texts = [text for texts, _ in pending for text in texts]
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(embed_executor, embedder.encode, all_texts)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            slots.release()
+        self.batches += 1
+        self.texts += len(all_texts)
+        offset = 0
+        for texts, future in pending:
+            if not future.done():
+                # A slice is a view: copied, a caller's vectors do not keep the whole batch alive
+                rows = vectors[offset:offset + len(texts)]
+                future.set_result(rows.copy() if len(pending) > 1 else rows)
+            offset += len(texts)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0
+        }
+
+embedding_batcher = EmbeddingBatcher(EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS, EMBED_WORKERS)
+
+async def encode_texts(texts: List[str]):
+    return await embedding_batcher.encode(texts)
+
+# Bulk loads encode large chunks on their own pool, so /ask query encodes never queue behind them
+bulk_embed_executor = ThreadPoolExecutor(max_workers=BULK_EMBED_WORKERS, thread_name_prefix="bulk-embed")
+
+async def encode_bulk_texts(texts: List[str]):
+    return await asyncio.get_running_loop().run_in_executor(bulk_embed_executor, embedder.encode, texts)
+
+async def warmup_embedder():
+    """Explicit warmup hook: loads the model and runs one encode on the embed pool"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(embed_executor, embedder.warmup)
+    except Exception as e:
+        logger.error(f"Embedding backend warmup failed: {e}")
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after `ttl` seconds"""
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+embedding_cache = TTLCache(EMBED_CACHE_SIZE, EMBED_CACHE_TTL)
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split()).rstrip("?!.,; ")
+
+async def embed_queries(queries: List[str]) -> list:
+    """Query vectors from the cache; every miss is encoded in a single call"""
+    keys = [normalize_query(query) for query in queries]
+    vectors = [embedding_cache.get(key) for key in keys]
+    missing = {key: query for key, query, vector in zip(keys, queries, vectors) if vector is None}
+    if missing:
+        with metrics.time("embed"):
+            encoded = dict(zip(missing, await encode_texts(list(missing.values()))))
+        for key, vector in encoded.items():
+            # Cached on its own so the entry holds 384 floats, not the array it was encoded in
+            embedding_cache.set(key, vector.copy())
+        vectors = [encoded[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+    return vectors
+
+async def embed_query(query: str):
+    return (await embed_queries([query]))[0]
 
 # Qdrant setup
-try:
-    qdrant_client = QdrantClient(
-        url="http://localhost:6333"   # Local Docker
-    )
-    logger.info("✅ Qdrant client connected")
+qdrant_client = AsyncQdrantClient(location=QDRANT_URL)
+# False when the collection predates sparse vectors; retrieval is then dense-only
+hybrid_search_enabled = True
+INDEXED_PAYLOAD_FIELDS = ("place", "source")
+
+def collection_config() -> dict:
+    """Unnamed dense vector plus the BM25-style sparse keyword vector"""
+    return {
+        "vectors_config": VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE),
+        "sparse_vectors_config": {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+    }
 
-    COLLECTION_NAME = "travel_knowledge"
+async def ensure_payload_indexes():
+    """Keyword indexes on `place` and `source` so filtered search skips non-matching points"""
+    info = await qdrant_client.get_collection(COLLECTION_NAME)
+    for field in INDEXED_PAYLOAD_FIELDS:
+        if field not in (info.payload_schema or {}):
+            await qdrant_client.create_payload_index(COLLECTION_NAME, field_name=field,
+                                                     field_schema=PayloadSchemaType.KEYWORD)
+            logger.info(f"Created payload index on '{field}'")
 
-    if not qdrant_client.collection_exists(COLLECTION_NAME):
-        qdrant_client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-        )
-        logger.info(f"✅ Collection '{COLLECTION_NAME}' created")
-    else:
-        logger.info(f"ℹ️ Collection '{COLLECTION_NAME}' already exists")
+async def setup_qdrant_collection():
+    global qdrant_client, hybrid_search_enabled
+    try:
+        if not await qdrant_client.collection_exists(COLLECTION_NAME):
+            await qdrant_client.create_collection(collection_name=COLLECTION_NAME, **collection_config())
+            logger.info(f"✅ Collection '{COLLECTION_NAME}' created")
+        else:
+            logger.info(f"ℹ️ Collection '{COLLECTION_NAME}' already exists")
+            info = await qdrant_client.get_collection(COLLECTION_NAME)
+            hybrid_search_enabled = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+            if not hybrid_search_enabled:
+                # Qdrant cannot add a sparse vector to an existing collection
+                logger.warning(f"Collection '{COLLECTION_NAME}' has no '{SPARSE_VECTOR_NAME}' sparse vector; "
+                               "keyword search is disabled until it is recreated and re-ingested")
+        await ensure_payload_indexes()
+        logger.info("✅ Qdrant client connected")
+    except Exception as e:
+        logger.error(f"❌ Failed to connect Qdrant: {e}")
+        qdrant_client = None
+
+# ----------------------------
+# Sparse keyword vectors
+# Keyword retrieval lives in Qdrant as a named sparse vector beside the dense one. Terms hash to
+# stable ids and carry BM25 term-frequency saturation; Qdrant applies IDF at query time.
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+SPARSE_VECTOR_NAME = "keywords"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
 
-except Exception as e:
-    logger.error(f"❌ Failed to connect Qdrant: {e}")
-    qdrant_client = None
+def term_id(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=4).digest(), "little")
+
+def sparse_doc_vector(text: str) -> SparseVector:
+    counts = Counter(term_id(term) for term in tokenize(text))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / BM25_AVG_DOC_LEN)
+    indices = sorted(counts)
+    return SparseVector(indices=indices, values=[counts[i] * (BM25_K1 + 1) / (counts[i] + norm) for i in indices])
+
+def sparse_query_vector(text: str) -> SparseVector:
+    indices = sorted({term_id(term) for term in tokenize(text)})
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
 
 # ----------------------------
 # Data ingestion
-def ingest_travel_data(travel_docs: List[str], place: str = None):
-    """Enhanced ingestion with place tracking"""
-    try:
-        vectors = embedder.encode(travel_docs).tolist()
+def doc_point_id(doc: str, place: Optional[str]) -> str:
+    """Content-addressed point ID: the same text for the same place always maps to the same point"""
+    return str(uuid.uuid5(DOC_ID_NAMESPACE, f"{place or 'general'}\x1f{' '.join(doc.split())}"))
 
-        if not qdrant_client.collection_exists(COLLECTION_NAME):
-            qdrant_client.recreate_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=len(vectors[0]), distance=Distance.COSINE)
-            )
+def make_point(doc: str, vector: List[float], place: Optional[str], source: str, point_id: str) -> PointStruct:
+    payload = {
+        "doc": doc,
+        "timestamp": datetime.now().isoformat(),
+        "place": place or "general",
+        "source": source
+    }
+    if hybrid_search_enabled:
+        vector = {"": vector, SPARSE_VECTOR_NAME: sparse_doc_vector(doc)}
+    return PointStruct(id=point_id, vector=vector, payload=payload)
 
-        points = []
-        for i, vector in enumerate(vectors):
-            payload = {
-                "doc": travel_docs[i],
-                "timestamp": datetime.now().isoformat(),
-                "place": place or "general",
-                "source": "dynamic_learning" if place else "initial_data"
-            }
-            points.append(PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload))
-        
-        qdrant_client.upsert(collection_name=COLLECTION_NAME, points=points)
+async def find_new_docs(point_ids: List[str]) -> List[int]:
+    """Positions of the first occurrence of each ID that Qdrant does not already store"""
+    first_seen: Dict[str, int] = {}
+    for i, point_id in enumerate(point_ids):
+        first_seen.setdefault(point_id, i)
+    stored = await qdrant_client.retrieve(
+        collection_name=COLLECTION_NAME,
+        ids=list(first_seen),
+        with_payload=False,
+        with_vectors=False
+    )
+    known = {str(point.id) for point in stored}
+    return [i for point_id, i in first_seen.items() if point_id not in known]
+
+async def ingest_travel_data(travel_docs: List[str], place: str = None, source: Optional[str] = None):
+    """Enhanced ingestion with place tracking; already-known documents are skipped before encoding"""
+    place = canonical_place(place) if place else None
+    source = source or ("dynamic_learning" if place else "initial_data")
+    try:
+        if not await qdrant_client.collection_exists(COLLECTION_NAME):
+            await qdrant_client.recreate_collection(collection_name=COLLECTION_NAME, **collection_config())
+
+        with metrics.time("ingest"):
+            point_ids = [doc_point_id(doc, place) for doc in travel_docs]
+            new_positions = await find_new_docs(point_ids)
+            if new_positions:
+                new_docs = [travel_docs[i] for i in new_positions]
+                vectors = (await encode_texts(new_docs)).tolist()
+                points = [make_point(doc, vector, place, source, point_ids[i])
+                          for i, doc, vector in zip(new_positions, new_docs, vectors)]
+                await qdrant_client.upsert(collection_name=COLLECTION_NAME, points=points)
 
-        # Update TF-IDF store
-        if hasattr(app.state, 'vector_store'):
-            existing_docs = app.state.vector_store["docs"]
-            all_docs = existing_docs + travel_docs
-        else:
-            all_docs = travel_docs
-            
-        tfidf = TfidfVectorizer().fit(all_docs)
-        tfidf_matrix = tfidf.transform(all_docs)
-        
-        app.state.vector_store = {
-            "tfidf": tfidf, 
-            "tfidf_matrix": tfidf_matrix, 
-            "docs": all_docs
-        }
-        
         if place:
-            intel_system.mark_as_learned(place)
+            if source != "initial_data":
+                await intel_system.backend.run(intel_system.mark_as_learned, place)
+            if new_positions:
+                answer_cache.invalidate_place(place)
         
-        logger.info(f"Successfully ingested {len(travel_docs)} documents" + 
-                   (f" for {place}" if place else ""))
+        skipped = len(travel_docs) - len(new_positions)
+        logger.info(f"Successfully ingested {len(new_positions)} documents" + 
+                   (f" for {place}" if place else "") +
+                   (f" ({skipped} already known)" if skipped else ""))
         return True
         
     except Exception as e:
         logger.error(f"Error in enhanced ingest: {e}")
         return False
 
+# ----------------------------
+# Bulk ingestion
+def iter_corpus_records(path: str, fmt: str, skip: int = 0):
+    """Streams (doc, place) records from a JSONL or CSV file without loading it into memory"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for i, row in enumerate(rows):
+            if i < skip:
+                continue
+            doc = row.get("doc") or row.get("text") or row.get("information")
+            if doc and doc.strip():
+                yield doc.strip(), row.get("place") or None
+            else:
+                yield None, None    # keeps record numbering stable for resume
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+async def bulk_ingest(path: str, fmt: Optional[str] = None, chunk_size: int = BULK_CHUNK_SIZE,
+                      parallel: int = BULK_PARALLEL_UPSERTS, resume: bool = True,
+                      progress: Optional[dict] = None) -> dict:
+    """Chunked dedupe -> encode -> upsert pipeline with up to `parallel` chunks in flight at once.
+
+    Progress is checkpointed to `<path>.checkpoint` as the number of leading records fully stored,
+    so an interrupted run resumes from there.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    checkpoint_path = f"{path}.checkpoint"
+    start_record = 0
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            start_record = json.load(f).get("records_done", 0)
+        logger.info(f"Resuming bulk ingest of {path} at record {start_record}")
+    progress = progress if progress is not None else {}
+    progress.update({"path": path, "status": "running", "resumed_from": start_record, "docs_ingested": 0,
+                     "records_done": start_record, "duplicates_skipped": 0, "docs_per_sec": 0.0, "peak_rss_mb": peak_rss_mb()})
+
+    # Chunks may finish out of order; the checkpoint only advances over a contiguous prefix
+    finished_ends: Set[int] = set()
+    chunk_ends: List[int] = []
+    started = time.monotonic()
+
+    def advance_checkpoint():
+        done = progress["records_done"]
+        while chunk_ends and chunk_ends[0] in finished_ends:
+            done = chunk_ends.pop(0)
+            finished_ends.discard(done)
+        if done != progress["records_done"]:
+            progress["records_done"] = done
+            with open(checkpoint_path, "w") as f:
+                json.dump({"records_done": done}, f)
+
+    async def store_chunk(docs: List[str], places: List[Optional[str]], point_ids: List[str], end: int):
+        new_positions = await find_new_docs(point_ids)
+        progress["duplicates_skipped"] += len(docs) - len(new_positions)
+        if new_positions:
+            vectors = (await encode_bulk_texts([docs[i] for i in new_positions])).tolist()
+            points = [make_point(docs[i], vector, places[i], "bulk_import", point_ids[i])
+                      for i, vector in zip(new_positions, vectors)]
+            # The chunk is checkpointed as done once this returns, so it must be persisted and searchable by then
+            await qdrant_client.upsert(collection_name=COLLECTION_NAME, points=points, wait=True)
+        for place in set(places[i] for i in new_positions if places[i]):
+            await intel_system.backend.run(intel_system.mark_as_learned, place)
+            answer_cache.invalidate_place(place)
+        progress["docs_ingested"] += len(new_positions)
+        finished_ends.add(end)
+
+    in_flight: Set[asyncio.Task] = set()
+    record_no = start_record
+    docs, places = [], []
+    records = iter_corpus_records(path, fmt, skip=start_record)
+    try:
+        while True:
+            record = next(records, None)
+            if record is not None:
+                record_no += 1
+                if record[0] is not None:
+                    docs.append(record[0])
+                    places.append(canonical_place(record[1]) if record[1] else None)
+            if len(docs) >= chunk_size or (record is None and docs):
+                point_ids = [doc_point_id(doc, place) for doc, place in zip(docs, places)]
+                chunk_ends.append(record_no)
+                in_flight.add(asyncio.create_task(store_chunk(docs, places, point_ids, record_no)))
+                docs, places = [], []
+                if len(in_flight) >= parallel:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                    advance_checkpoint()
+                elapsed = time.monotonic() - started
+                progress["docs_per_sec"] = round(progress["docs_ingested"] / elapsed, 1) if elapsed else 0.0
+                progress["peak_rss_mb"] = peak_rss_mb()
+            elif record is None:
+                break
+        for task in asyncio.as_completed(in_flight):
+            await task
+        progress["records_done"] = record_no
+        progress["status"] = "completed"
+    except Exception as e:
+        for task in in_flight:
+            task.cancel()
+        progress["status"] = "failed"
+        progress["error"] = str(e)
+        logger.error(f"Bulk ingest of {path} failed at record {progress['records_done']}: {e}")
+        raise
+    finally:
+        elapsed = time.monotonic() - started
+        progress["elapsed_sec"] = round(elapsed, 2)
+        progress["docs_per_sec"] = round(progress["docs_ingested"] / elapsed, 1) if elapsed else 0.0
+        progress["peak_rss_mb"] = peak_rss_mb()
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logger.info(f"Bulk ingested {progress['docs_ingested']} docs from {path} "
+                f"at {progress['docs_per_sec']} docs/sec (peak RSS {progress['peak_rss_mb']} MB)")
+    return progress
+
+bulk_jobs: Dict[str, dict] = {}
+
+def prune_bulk_jobs(keep: int = BULK_JOBS_KEPT):
+    """Drops the oldest finished jobs beyond `keep`; running jobs are never dropped"""
+    finished = [job_id for job_id, job in bulk_jobs.items() if job["status"] != "running"]
+    for job_id in finished[:max(0, len(finished) - keep)]:
+        del bulk_jobs[job_id]
+
 # ----------------------------
 # Intelligence System State
-class IntelligenceSystem:
+class LearningQueue:
+    """Places waiting to be learned, most-requested first.
+
+    Pushing a queued place again re-prioritizes it (stale heap entries are skipped on pop), and places
+    a worker has taken stay out of the queue until `done` is called.
+    """
     def __init__(self):
-        self.unknown_places = defaultdict(int)
-        self.learning_queue = set()
-        self.recently_learned = set()
-        self.user_contributions = []
-        self.last_cleanup = datetime.now()
+        self.heap = []
+        self.priority: Dict[str, int] = {}
+        self.enqueued_at: Dict[str, float] = {}
+        self.in_progress: Set[str] = set()
+        self.order = itertools.count()
+        self.available = asyncio.Event()
+
+    def push(self, place: str, priority: int = 1):
+        if place in self.in_progress or self.priority.get(place) == priority:
+            return
+        self.priority[place] = priority
+        self.enqueued_at.setdefault(place, time.monotonic())
+        heapq.heappush(self.heap, (-priority, next(self.order), place))
+        if len(self.heap) > 4 * len(self.priority) + 64:
+            self.heap = [entry for entry in self.heap if self.priority.get(entry[2]) == -entry[0]]
+            heapq.heapify(self.heap)
+        self.available.set()
+
+    def discard(self, place: str):
+        self.priority.pop(place, None)
+        self.enqueued_at.pop(place, None)
+
+    def pop(self) -> Optional[tuple[str, float]]:
+        """Claims the highest-priority place, with the seconds it spent queued; None when empty"""
+        while self.heap:
+            neg_priority, _, place = heapq.heappop(self.heap)
+            if self.priority.get(place) == -neg_priority:
+                del self.priority[place]
+                self.in_progress.add(place)
+                return place, time.monotonic() - self.enqueued_at.pop(place)
+        return None
+
+    async def get(self) -> tuple[str, float]:
+        while True:
+            entry = self.pop()
+            if entry is not None:
+                return entry
+            self.available.clear()
+            await self.available.wait()
+
+    def take(self, place: str) -> bool:
+        """Claims a place outside of `get`, e.g. for on-demand learning"""
+        self.discard(place)
+        self.in_progress.add(place)
+        return True
+
+    def claimed(self, place: str) -> bool:
+        return place in self.in_progress
+
+    def done(self, place: str):
+        self.in_progress.discard(place)
+
+    def __len__(self) -> int:
+        return len(self.priority)
+
+    def __contains__(self, place: str) -> bool:
+        return place in self.priority
+
+    def ranked(self) -> List[str]:
+        return sorted(self.priority, key=lambda place: -self.priority[place])
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter counter holding at most `capacity` keys.
+
+    A new key arriving when full replaces the current minimum and inherits its count as overestimation
+    error. Lookups return the guaranteed lower bound (count - error) so a burst of one-off keys cannot push
+    a place over a threshold; `top` ranks by the estimated count.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.heap = []    # (count, key) with stale entries, rebuilt when it grows past 4x capacity
+
+    def add(self, key: str, count: int = 1) -> int:
+        if key not in self.counts:
+            error = 0
+            if len(self.counts) >= self.capacity:
+                error = self._evict_min()
+            self.counts[key] = error
+            self.errors[key] = error
+        self.counts[key] += count
+        heapq.heappush(self.heap, (self.counts[key], key))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, key) for key, count in self.counts.items()]
+            heapq.heapify(self.heap)
+        return self[key]
+
+    def _evict_min(self) -> int:
+        while True:
+            count, key = heapq.heappop(self.heap)
+            if self.counts.get(key) == count:
+                del self.counts[key]
+                del self.errors[key]
+                return count
+
+    def __getitem__(self, key: str) -> int:
+        return self.counts.get(key, 0) - self.errors.get(key, 0)
+
+    def get(self, key: str, default: int = 0) -> int:
+        return self[key] if key in self.counts else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def discard(self, key: str):
+        # The stale heap entry is skipped by _evict_min
+        self.counts.pop(key, None)
+        self.errors.pop(key, None)
+
+    def clear(self):
+        self.counts.clear()
+        self.errors.clear()
+        self.heap = []
+
+    def top(self, k: int) -> List[tuple]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+
+    def to_dict(self) -> dict:
+        return {"counts": dict(self.counts), "errors": {key: e for key, e in self.errors.items() if e}}
+
+    def load_dict(self, state: dict):
+        self.clear()
+        if isinstance(state.get("counts"), dict):
+            counts, errors = state["counts"], state.get("errors", {})
+        else:
+            counts, errors = state, {}    # older snapshots stored plain {place: count}
+        for key, count in heapq.nlargest(self.capacity, counts.items(), key=lambda item: item[1]):
+            self.counts[key] = count
+            self.errors[key] = errors.get(key, 0)
+        self.heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+class ContributionLog:
+    """Keeps this process's last `max_recent` contributions and appends every one to a JSONL file.
+
+    The running total lives in the state backend so all workers count together. File appends run on a
+    single writer thread, in order, so a slow disk never blocks the caller.
+    """
+    def __init__(self, max_recent: int, path: Optional[str], backend):
+        self.recent = deque(maxlen=max(1, max_recent))
+        self.path = path
+        self.backend = backend
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="contributions")
+
+    @property
+    def total(self) -> int:
+        return int(self.backend.get_value("total_contributions", 0))
+
+    @total.setter
+    def total(self, value: int):
+        self.backend.set_value("total_contributions", value)
+
+    def append(self, entry: dict):
+        self.recent.append(entry)
+        self.backend.incr_value("total_contributions")
+        if self.path:
+            self.writer.submit(self._write, json.dumps(entry) + "\n")
+
+    def _write(self, line: str):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            logger.error(f"Could not append contribution to {self.path}: {e}")
+
+class SessionStore:
+    """Last `max_turns` question/answer pairs per session ID.
+
+    Sessions are kept in least-recently-used order: past `max_sessions` the oldest is evicted, and one
+    not touched for `idle_ttl` seconds expires.
+    """
+    def __init__(self, max_sessions: int, idle_ttl: float, max_turns: int):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self.max_turns = max(1, max_turns)
+        self.sessions: OrderedDict = OrderedDict()
+
+    def turns(self, session_id: str) -> List[tuple[str, str]]:
+        self._expire()
+        session = self.sessions.get(session_id)
+        if session is None:
+            return []
+        # Reading counts as activity; touched must follow the LRU order for _expire to stop at the first live one
+        session["touched"] = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return list(session["turns"])
+
+    def append(self, session_id: str, question: str, answer: str):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = {"turns": deque(maxlen=self.max_turns)}
+        session["turns"].append((question, answer))
+        session["touched"] = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        self._expire()
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest["touched"] >= cutoff:
+                break
+            self.sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+# ----------------------------
+# Shared state backends
+# Learning state (unknown-place counts, the learning queue, learned places and counters) goes through
+# a backend. "memory" is process-local; "sqlite" keeps it in one WAL-mode database file so every
+# uvicorn worker on a host shares one view. Documents are already shared through Qdrant.
+# Async code reaches the backend through `await backend.run(fn, *args)`: SQLite calls can wait on
+# another process's write lock, so they run on the backend's own thread instead of the event loop.
+class MemoryStateBackend:
+    """Process-local state, snapshotted to SNAPSHOT_DIR; consistent only with a single worker"""
+    name = "memory"
+    persistent = False
+
+    def __init__(self, path: Optional[str] = None):
+        self.values: Dict[str, float] = {}
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+    def unknown_places(self, capacity: int) -> SpaceSaving:
+        return SpaceSaving(capacity)
+
+    def learning_queue(self) -> LearningQueue:
+        return LearningQueue()
+
+    def learned_places(self) -> Set[str]:
+        return set()
+
+    def sessions(self, max_sessions: int, idle_ttl: float, max_turns: int) -> SessionStore:
+        return SessionStore(max_sessions, idle_ttl, max_turns)
+
+    def get_value(self, key: str, default=None):
+        return self.values.get(key, default)
+
+    def set_value(self, key: str, value: float):
+        self.values[key] = value
+
+    def incr_value(self, key: str, amount: float = 1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS unknown_places (place TEXT PRIMARY KEY, count INTEGER NOT NULL, error INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS unknown_places_count ON unknown_places (count);
+CREATE TABLE IF NOT EXISTS learning_queue (place TEXT PRIMARY KEY, priority INTEGER NOT NULL,
+                                           enqueued_at REAL NOT NULL, claimed_at REAL);
+CREATE INDEX IF NOT EXISTS learning_queue_priority ON learning_queue (priority DESC, enqueued_at);
+CREATE TABLE IF NOT EXISTS learned_places (place TEXT PRIMARY KEY, learned_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS state_values (key TEXT PRIMARY KEY, value REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, touched_at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched_at);
+CREATE TABLE IF NOT EXISTS session_turns (session_id TEXT NOT NULL, seq INTEGER NOT NULL, question TEXT NOT NULL,
+                                          answer TEXT NOT NULL, PRIMARY KEY (session_id, seq));
+"""
+
+class SqliteStateBackend:
+    """State in one SQLite database; writes take an IMMEDIATE transaction so read-modify-write is atomic across processes"""
+    name = "sqlite"
+    persistent = True
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=STATE_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.lock = threading.RLock()
+        # One thread: the connection is serialized by the lock anyway, and calls keep their order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def query(self, sql: str, params=()) -> list:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def unknown_places(self, capacity: int) -> "SqliteSpaceSaving":
+        return SqliteSpaceSaving(self, capacity)
+
+    def learning_queue(self) -> "SqliteLearningQueue":
+        return SqliteLearningQueue(self)
+
+    def learned_places(self) -> "SqliteLearnedPlaces":
+        return SqliteLearnedPlaces(self)
+
+    def sessions(self, max_sessions: int, idle_ttl: float, max_turns: int) -> "SqliteSessionStore":
+        return SqliteSessionStore(self, max_sessions, idle_ttl, max_turns)
+
+    def get_value(self, key: str, default=None):
+        rows = self.query("SELECT value FROM state_values WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def set_value(self, key: str, value: float):
+        self.query("INSERT INTO state_values (key, value) VALUES (?, ?) "
+                   "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def incr_value(self, key: str, amount: float = 1):
+        self.query("INSERT INTO state_values (key, value) VALUES (?, ?) "
+                   "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value", (key, amount))
+
+class SqliteSpaceSaving:
+    """SpaceSaving over the shared `unknown_places` table"""
+    def __init__(self, backend: SqliteStateBackend, capacity: int):
+        self.backend = backend
+        self.capacity = max(1, capacity)
+
+    def add(self, key: str, count: int = 1) -> int:
+        with self.backend.transaction() as conn:
+            row = conn.execute("SELECT count, error FROM unknown_places WHERE place = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE unknown_places SET count = count + ? WHERE place = ?", (count, key))
+                return row[0] + count - row[1]
+            error = 0
+            if conn.execute("SELECT COUNT(*) FROM unknown_places").fetchone()[0] >= self.capacity:
+                place, error = conn.execute("SELECT place, count FROM unknown_places ORDER BY count LIMIT 1").fetchone()
+                conn.execute("DELETE FROM unknown_places WHERE place = ?", (place,))
+            conn.execute("INSERT INTO unknown_places (place, count, error) VALUES (?, ?, ?)", (key, error + count, error))
+            return count
+
+    def __getitem__(self, key: str) -> int:
+        rows = self.backend.query("SELECT count - error FROM unknown_places WHERE place = ?", (key,))
+        return rows[0][0] if rows else 0
+
+    def get(self, key: str, default: int = 0) -> int:
+        rows = self.backend.query("SELECT count - error FROM unknown_places WHERE place = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.backend.query("SELECT 1 FROM unknown_places WHERE place = ?", (key,)))
+
+    def __len__(self) -> int:
+        return self.backend.query("SELECT COUNT(*) FROM unknown_places")[0][0]
+
+    def discard(self, key: str):
+        self.backend.query("DELETE FROM unknown_places WHERE place = ?", (key,))
+
+    def clear(self):
+        self.backend.query("DELETE FROM unknown_places")
+
+    def top(self, k: int) -> List[tuple]:
+        return [tuple(row) for row in self.backend.query(
+            "SELECT place, count FROM unknown_places ORDER BY count DESC LIMIT ?", (k,))]
+
+class SqliteLearningQueue:
+    """LearningQueue over the shared `learning_queue` table.
+
+    A claimed row belongs to whichever process is learning that place; claims older than
+    LEARN_CLAIM_TIMEOUT are treated as abandoned by a crashed worker and handed out again.
+    """
+    def __init__(self, backend: SqliteStateBackend):
+        self.backend = backend
+        self.available = asyncio.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None    # the loop `get` waits on, set by the first `get`
+
+    def push(self, place: str, priority: int = 1):
+        self.backend.query(
+            "INSERT INTO learning_queue (place, priority, enqueued_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(place) DO UPDATE SET priority = excluded.priority WHERE claimed_at IS NULL",
+            (place, priority, time.time()))
+        # Pushes usually run on the state thread, and asyncio.Event may only be touched from its loop
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.available.set)
+
+    def discard(self, place: str):
+        self.backend.query("DELETE FROM learning_queue WHERE place = ? AND claimed_at IS NULL", (place,))
+
+    def pop(self) -> Optional[tuple[str, float]]:
+        now = time.time()
+        with self.backend.transaction() as conn:
+            row = conn.execute(
+                "SELECT place, enqueued_at FROM learning_queue WHERE claimed_at IS NULL OR claimed_at < ? "
+                "ORDER BY priority DESC, enqueued_at LIMIT 1", (now - LEARN_CLAIM_TIMEOUT,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE learning_queue SET claimed_at = ? WHERE place = ?", (now, row[0]))
+        return row[0], now - row[1]
+
+    async def get(self) -> tuple[str, float]:
+        # Other processes push without waking this one, so an empty queue is polled
+        self.loop = asyncio.get_running_loop()
+        while True:
+            entry = await self.backend.run(self.pop)
+            if entry is not None:
+                return entry
+            self.available.clear()
+            try:
+                await asyncio.wait_for(self.available.wait(), STATE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def take(self, place: str) -> bool:
+        """Claims a place unless another process holds a live claim on it"""
+        now = time.time()
+        with self.backend.transaction() as conn:
+            row = conn.execute("SELECT claimed_at FROM learning_queue WHERE place = ?", (place,)).fetchone()
+            if row and row[0] is not None and row[0] >= now - LEARN_CLAIM_TIMEOUT:
+                return False
+            conn.execute("INSERT INTO learning_queue (place, priority, enqueued_at, claimed_at) VALUES (?, 0, ?, ?) "
+                         "ON CONFLICT(place) DO UPDATE SET claimed_at = excluded.claimed_at", (place, now, now))
+        return True
+
+    def claimed(self, place: str) -> bool:
+        return bool(self.backend.query("SELECT 1 FROM learning_queue WHERE place = ? AND claimed_at >= ?",
+                                       (place, time.time() - LEARN_CLAIM_TIMEOUT)))
+
+    def done(self, place: str):
+        # Only the claim is released: a place handed back with `push` after its claim stays queued
+        self.backend.query("DELETE FROM learning_queue WHERE place = ? AND claimed_at IS NOT NULL", (place,))
+
+    def __len__(self) -> int:
+        return self.backend.query("SELECT COUNT(*) FROM learning_queue WHERE claimed_at IS NULL")[0][0]
+
+    def __contains__(self, place: str) -> bool:
+        return bool(self.backend.query("SELECT 1 FROM learning_queue WHERE place = ? AND claimed_at IS NULL", (place,)))
+
+    def ranked(self) -> List[str]:
+        return [row[0] for row in self.backend.query(
+            "SELECT place FROM learning_queue WHERE claimed_at IS NULL ORDER BY priority DESC, enqueued_at")]
+
+class SqliteLearnedPlaces:
+    """Set of recently learned places in the shared `learned_places` table"""
+    def __init__(self, backend: SqliteStateBackend):
+        self.backend = backend
+
+    def add(self, place: str):
+        self.backend.query("INSERT OR IGNORE INTO learned_places (place, learned_at) VALUES (?, ?)", (place, time.time()))
+
+    def clear(self):
+        self.backend.query("DELETE FROM learned_places")
+
+    def __contains__(self, place: str) -> bool:
+        return bool(self.backend.query("SELECT 1 FROM learned_places WHERE place = ?", (place,)))
+
+    def __len__(self) -> int:
+        return self.backend.query("SELECT COUNT(*) FROM learned_places")[0][0]
+
+    def __iter__(self):
+        return iter([row[0] for row in self.backend.query("SELECT place FROM learned_places")])
+
+class SqliteSessionStore:
+    """SessionStore over the shared `sessions` and `session_turns` tables, so any worker can continue a session"""
+    def __init__(self, backend: SqliteStateBackend, max_sessions: int, idle_ttl: float, max_turns: int):
+        self.backend = backend
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self.max_turns = max(1, max_turns)
+
+    def turns(self, session_id: str) -> List[tuple[str, str]]:
+        rows = self.backend.query(
+            "SELECT t.question, t.answer FROM session_turns t JOIN sessions s ON s.session_id = t.session_id "
+            "WHERE t.session_id = ? AND s.touched_at >= ? ORDER BY t.seq", (session_id, time.time() - self.idle_ttl))
+        return [tuple(row) for row in rows]
+
+    def append(self, session_id: str, question: str, answer: str):
+        now = time.time()
+        with self.backend.transaction() as conn:
+            conn.execute("INSERT INTO sessions (session_id, touched_at) VALUES (?, ?) "
+                         "ON CONFLICT(session_id) DO UPDATE SET touched_at = excluded.touched_at", (session_id, now))
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM session_turns WHERE session_id = ?",
+                               (session_id,)).fetchone()[0]
+            conn.execute("INSERT INTO session_turns (session_id, seq, question, answer) VALUES (?, ?, ?, ?)",
+                         (session_id, seq, question, answer))
+            conn.execute("DELETE FROM session_turns WHERE session_id = ? AND seq <= ?", (session_id, seq - self.max_turns))
+            evicted = [row[0] for row in conn.execute(
+                "SELECT session_id FROM sessions WHERE touched_at < ?", (now - self.idle_ttl,))]
+            excess = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - len(evicted) - self.max_sessions
+            if excess > 0:
+                evicted += [row[0] for row in conn.execute(
+                    "SELECT session_id FROM sessions WHERE touched_at >= ? ORDER BY touched_at LIMIT ?",
+                    (now - self.idle_ttl, excess))]
+            for table in ("sessions", "session_turns"):
+                conn.executemany(f"DELETE FROM {table} WHERE session_id = ?", [(sid,) for sid in evicted])
+
+    def __len__(self) -> int:
+        return self.backend.query("SELECT COUNT(*) FROM sessions WHERE touched_at >= ?",
+                                  (time.time() - self.idle_ttl,))[0][0]
+
+STATE_BACKENDS = {backend.name: backend for backend in (MemoryStateBackend, SqliteStateBackend)}
+
+def create_state_backend(name: str, path: str = STATE_DB_PATH):
+    if name not in STATE_BACKENDS:
+        raise ValueError(f"Unknown state backend '{name}', expected one of {sorted(STATE_BACKENDS)}")
+    return STATE_BACKENDS[name](path)
+
+class IntelligenceSystem:
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryStateBackend()
+        self.unknown_places = self.backend.unknown_places(UNKNOWN_PLACES_CAPACITY)
+        self.learning_queue = self.backend.learning_queue()
+        self.recently_learned = self.backend.learned_places()
+        self.user_contributions = ContributionLog(RECENT_CONTRIBUTIONS, CONTRIBUTION_LOG, self.backend)
+        if self.backend.get_value("last_cleanup") is None:
+            self.last_cleanup = datetime.now()
+
+    @property
+    def last_cleanup(self) -> datetime:
+        return datetime.fromtimestamp(self.backend.get_value("last_cleanup", time.time()))
+
+    @last_cleanup.setter
+    def last_cleanup(self, value: datetime):
+        self.backend.set_value("last_cleanup", value.timestamp())
         
-    def track_unknown_place(self, place: str):
-        self.unknown_places[place] += 1
-        logger.info(f"Unknown place '{place}' requested {self.unknown_places[place]} times")
-        if self.unknown_places[place] >= 2:
-            self.learning_queue.add(place)
+    def track_unknown_place(self, place: str) -> int:
+        count = self.unknown_places.add(place)
+        logger.info(f"Unknown place '{place}' requested {count} times")
+        if count >= 2:
+            self.learning_queue.push(place, count)
             logger.info(f"Added '{place}' to learning queue")
+        return count
     
     def mark_as_learned(self, place: str):
-        if place in self.learning_queue:
-            self.learning_queue.remove(place)
+        place_gazetteer.add(place)
+        self.learning_queue.discard(place)
         self.recently_learned.add(place)
-        if place in self.unknown_places:
-            del self.unknown_places[place]
+        self.unknown_places.discard(place)
     
     def cleanup_old_data(self):
         if datetime.now() - self.last_cleanup > timedelta(hours=24):
@@ -150,7 +1290,83 @@ class IntelligenceSystem:
             self.recently_learned.clear()
             self.last_cleanup = datetime.now()
 
-intel_system = IntelligenceSystem()
+    def stats(self) -> dict:
+        return {
+            "unknown_places": len(self.unknown_places),
+            "learning_queue": len(self.learning_queue),
+            "recently_learned": len(self.recently_learned),
+            "total_contributions": self.user_contributions.total,
+            "last_cleanup": self.last_cleanup.isoformat(),
+            "most_requested_unknown": dict(self.unknown_places.top(STATUS_TOP_K))
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "unknown_places": self.unknown_places.to_dict(),
+            "learning_queue": self.learning_queue.ranked(),
+            "recently_learned": sorted(self.recently_learned),
+            "user_contributions": list(self.user_contributions.recent),
+            "total_contributions": self.user_contributions.total,
+            "last_cleanup": self.last_cleanup.isoformat()
+        }
+
+    def load_dict(self, state: dict):
+        self.unknown_places.load_dict(state.get("unknown_places", {}))
+        self.learning_queue = self.backend.learning_queue()
+        for place in state.get("learning_queue", []):
+            self.learning_queue.push(place, self.unknown_places.get(place, 1))
+        self.recently_learned = set(state.get("recently_learned", []))
+        contributions = state.get("user_contributions", [])
+        self.user_contributions.recent.clear()
+        self.user_contributions.recent.extend(contributions)
+        self.user_contributions.total = state.get("total_contributions", len(contributions))
+        if "last_cleanup" in state:
+            self.last_cleanup = datetime.fromisoformat(state["last_cleanup"])
+
+intel_system = IntelligenceSystem(create_state_backend(STATE_BACKEND))
+session_store = intel_system.backend.sessions(SESSION_MAX, SESSION_IDLE_TTL, SESSION_MAX_TURNS)
+
+# ----------------------------
+# Knowledge-base snapshots
+# Documents and both vector kinds live in Qdrant; only IntelligenceSystem state is process-local.
+snapshot_lock = asyncio.Lock()
+
+def write_json_atomic(path: str, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def restore_snapshot() -> bool:
+    """Reloads IntelligenceSystem state, if present; a persistent state backend needs no snapshot"""
+    intel_path = os.path.join(SNAPSHOT_DIR, "intel_state.json")
+    if intel_system.backend.persistent:
+        return False
+    try:
+        if os.path.exists(intel_path):
+            with open(intel_path) as f:
+                intel_system.load_dict(json.load(f))
+            return True
+    except Exception as e:
+        logger.error(f"Snapshot restore failed, starting cold: {e}")
+    return False
+
+async def save_snapshot():
+    if snapshot_lock.locked():
+        return
+    if intel_system.backend.persistent:
+        return
+    async with snapshot_lock:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        write_json_atomic(os.path.join(SNAPSHOT_DIR, "intel_state.json"), intel_system.to_dict())
+
+async def snapshot_loop():
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        try:
+            await save_snapshot()
+        except Exception as e:
+            logger.error(f"Periodic snapshot error: {e}")
 
 # ----------------------------
 # Pydantic Models
@@ -160,6 +1376,8 @@ class QA(BaseModel):
 
 class QuestionInput(BaseModel):
     question: str
+    session_id: Optional[str] = None
+    start_session: bool = False    # without a session_id, a new session is only created when asked for
 
 class AnswerResponse(BaseModel):
     question: str
@@ -168,25 +1386,168 @@ class AnswerResponse(BaseModel):
     learned_new_info: bool
     history: List[QA]
     confidence_level: Optional[str] = None
+    session_id: Optional[str] = None
+    prompt_tokens_saved: int = 0
+
+class BatchQuestionInput(BaseModel):
+    questions: List[str]
+
+class BatchAnswerResponse(BaseModel):
+    answers: List[AnswerResponse]
 
 class ContributeInfo(BaseModel):
     place: str
     information: str
     user_id: Optional[str] = "anonymous"
 
+class BulkIngestRequest(BaseModel):
+    path: str
+    format: Optional[str] = None
+    chunk_size: int = BULK_CHUNK_SIZE
+    parallel: int = BULK_PARALLEL_UPSERTS
+    resume: bool = True
+
 # ----------------------------
 # Enhanced Knowledge Management
+# Built-in gazetteer; GAZETTEER_FILE adds more, one "Canonical|alias|alias" entry per line.
+# All-caps aliases (LA, UK) and names prefixed with "=" (=Turkey) only match in exactly that case,
+# so they do not fire on ordinary words such as "la" or "turkey".
+KNOWN_PLACES = [
+    "Paris", "France", "Tokyo", "Kyoto", "Osaka", "Japan", "New York City|New York|NYC", "Los Angeles|LA",
+    "San Francisco", "Chicago", "Miami", "Las Vegas", "United States|USA", "Canada", "Toronto", "Vancouver",
+    "Mexico", "Cancun", "Maldives", "Dubai", "Abu Dhabi", "United Arab Emirates|UAE", "Rome", "Venice",
+    "Florence", "Milan", "Italy", "Bali", "Indonesia", "London", "England", "Scotland", "Edinburgh",
+    "United Kingdom|UK", "Thailand", "Bangkok", "Phuket", "Iceland", "Reykjavik", "Spain", "Barcelona",
+    "Madrid", "Portugal", "Lisbon", "Germany", "Berlin", "Munich", "Amsterdam", "Netherlands", "Greece",
+    "Athens", "Santorini", "=Turkey", "Istanbul", "Egypt", "Cairo", "Morocco", "Marrakech", "South Africa",
+    "Cape Town", "Kenya", "India", "Delhi", "Mumbai", "Goa", "Nepal", "Sri Lanka", "Vietnam", "Hanoi",
+    "Ho Chi Minh City|Saigon", "Singapore", "Hong Kong", "China", "Beijing", "Shanghai", "South Korea",
+    "Seoul", "Australia", "Sydney", "Melbourne", "New Zealand", "Brazil", "Rio de Janeiro", "Peru", "Cusco",
+    "Machu Picchu", "Argentina", "Buenos Aires", "Switzerland", "Austria", "Vienna", "Prague", "Budapest",
+    "Croatia", "Dubrovnik", "Norway", "Sweden", "Stockholm", "Denmark", "Copenhagen", "Ireland", "Dublin"
+]
+PLACE_TOKEN_PATTERN = re.compile(r"\w+(?:['’-]\w+)*")
+# Capitalized names right after a place indicator are candidate unknown places
+PLACE_CANDIDATE_PATTERN = re.compile(r"\b(?i:in|to|from|visit|about|around|near)\s+(?i:the\s+)?([A-Z][\w'’-]*(?:\s+[A-Z][\w'’-]*){0,3})")
+NOT_PLACES = {
+    "i", "the", "my", "our", "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december", "monday", "tuesday", "wednesday", "thursday",
+    "friday", "saturday", "sunday", "spring", "summer", "autumn", "fall", "winter", "christmas", "easter"
+}
+PLACE_END = ""    # trie key marking a complete name; tokens are never empty
+
+def place_tokens(text: str) -> List[str]:
+    """Case- and accent-insensitive word tokens"""
+    folded = text.casefold()
+    if not folded.isascii():
+        folded = "".join(ch for ch in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(ch))
+    return PLACE_TOKEN_PATTERN.findall(folded)
+
+class PlaceGazetteer:
+    """Token trie of normalized place names and aliases, each ending in its canonical name.
+
+    Matching is one left-to-right pass that takes the longest name starting at each token and skips
+    past it, so "New York City" wins over "New York". Adding a name only touches its own path.
+    Exact-case names live in a small table matched by one regex over the original text instead.
+    """
+    def __init__(self):
+        self.root: dict = {}
+        self.size = 0
+        self.exact: Dict[str, str] = {}
+        self.exact_folded: Dict[str, str] = {}    # for `canonical`, where the text is known to name a place
+        self.exact_pattern: Optional[re.Pattern] = None    # rebuilt on the next find after an exact add
+
+    def add(self, name: str, canonical: Optional[str] = None, exact: bool = False) -> bool:
+        if exact:
+            key = " ".join(name.split())
+            if not key or key in self.exact:
+                return False
+            self.exact[key] = canonical or key
+            self.exact_folded.setdefault(key.casefold(), self.exact[key])
+            self.exact_pattern = None
+            self.size += 1
+            return True
+        tokens = place_tokens(name)
+        if not tokens:
+            return False
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if PLACE_END in node:
+            return False
+        node[PLACE_END] = canonical or " ".join(name.split())
+        self.size += 1
+        return True
+
+    def find(self, text: str) -> List[str]:
+        tokens = place_tokens(text)
+        found: Dict[str, None] = {}
+        i = 0
+        while i < len(tokens):
+            node, match, match_end = self.root, None, i + 1
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if PLACE_END in node:
+                    match, match_end = node[PLACE_END], j + 1
+            if match is not None:
+                found[match] = None
+            i = match_end
+        if self.exact:
+            if self.exact_pattern is None:
+                names = sorted(self.exact, key=len, reverse=True)
+                self.exact_pattern = re.compile(r"(?<!\w)(" + "|".join(map(re.escape, names)) + r")(?!\w)")
+            for exact_match in self.exact_pattern.finditer(text):
+                found[self.exact[exact_match.group(1)]] = None
+        return list(found)
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Canonical name when all of `name` is a known name or alias, else None"""
+        node = self.root
+        for token in place_tokens(name):
+            node = node.get(token)
+            if node is None:
+                break
+        else:
+            if PLACE_END in node:
+                return node[PLACE_END]
+        return self.exact_folded.get(" ".join(name.split()).casefold())
+
+    def __contains__(self, name: str) -> bool:
+        return self.canonical(name) is not None
+
+def load_gazetteer(path: Optional[str] = None) -> PlaceGazetteer:
+    gazetteer = PlaceGazetteer()
+    entries = list(KNOWN_PLACES)
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        except OSError as e:
+            logger.error(f"Could not read gazetteer {path}: {e}")
+    for entry in entries:
+        names = [name.strip() for name in entry.split("|") if name.strip()]
+        canonical = names[0].lstrip("=")
+        for name in names:
+            exact = name.startswith("=") or (len(name) > 1 and name.isupper())
+            gazetteer.add(name.lstrip("="), canonical, exact=exact)
+    return gazetteer
+
+place_gazetteer = load_gazetteer(GAZETTEER_FILE)
+
+def canonical_place(place: str) -> str:
+    """The name documents are stored under, so they match the canonical names retrieval filters on"""
+    return place_gazetteer.canonical(place) or " ".join(place.split())
+
 def extract_place_names(text: str) -> List[str]:
-    import re
-    place_indicators = ['in ', 'to ', 'from ', 'visit ', 'about ', 'around ']
-    places = []
-    for indicator in place_indicators:
-        pattern = fr'{indicator}([A-Z][a-zA-Z\s]+?)(?:\s|$|,|\.|!|\?)'
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        places.extend([match.strip() for match in matches])
-    capitalized = re.findall(r'\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b', text)
-    places.extend(capitalized)
-    return list(set(places))
+    """Known places by canonical name, plus capitalized names after "in", "visit", ... that are not known yet"""
+    places = place_gazetteer.find(text)
+    for match in PLACE_CANDIDATE_PATTERN.finditer(text):
+        candidate = match.group(1)
+        if candidate.lower() not in NOT_PLACES and not place_gazetteer.find(candidate):
+            places.append(candidate)
+    return list(dict.fromkeys(places))
 
 async def search_web_for_place(place: str) -> List[str]:
     try:
@@ -205,160 +1566,895 @@ async def search_web_for_place(place: str) -> List[str]:
 
 # ----------------------------
 # Intelligent Retrieval
-def retrieve_with_intelligence(query: str, store: dict, docs: List[str], top_k=5) -> tuple[List[str], str, List[str]]:
+def hybrid_request(query: str, query_vec, limit: int, places: Optional[List[str]] = None) -> QueryRequest:
+    """Dense and sparse keyword candidates merged with reciprocal rank fusion.
+
+    With `places`, the candidates are also fetched within those places, weighted so that every one of them
+    outranks the global candidates; those fill whatever is left. Filtered and global search share one query.
+    """
+    keywords = sparse_query_vector(query)
+    prefetch, weights = [], []
+    # A filtered hit at the worst rank must beat a global-only hit ranked first by both kinds
+    place_weight = 2 * (RRF_K + 2 * limit) / (RRF_K + 1) + 1
+    scopes = [(None, 1.0)]
+    if places:
+        scopes.append((Filter(must=[FieldCondition(key="place", match=MatchAny(any=places))]), place_weight))
+    for query_filter, weight in scopes:
+        prefetch.append(Prefetch(query=query_vec, filter=query_filter, limit=limit * 2, score_threshold=0.3))
+        weights.append(weight)
+        if hybrid_search_enabled and keywords.indices:
+            prefetch.append(Prefetch(query=keywords, using=SPARSE_VECTOR_NAME, filter=query_filter, limit=limit * 2,
+                                     score_threshold=KEYWORD_MIN_SCORE))
+            weights.append(weight)
+    fusion = RrfQuery(rrf=Rrf(k=RRF_K, weights=weights)) if places else FusionQuery(fusion=Fusion.RRF)
+    return QueryRequest(prefetch=prefetch, query=fusion, limit=limit, with_payload=True, with_vector=True)
+
+async def hybrid_query_batch(requests: List[QueryRequest]) -> List[list]:
+    with metrics.time("qdrant_query"):
+        responses = await qdrant_client.query_batch_points(collection_name=COLLECTION_NAME, requests=requests)
+    return [response.points for response in responses]
+
+def summarize_hits(points: list, query_vec) -> tuple[List[str], str, List[str], List[str], list]:
+    # RRF scores are rank-based, so confidence comes from the dense similarity of the fused hits
+    query_arr = np.asarray(query_vec, dtype=np.float32)
+    query_norm = np.linalg.norm(query_arr) or 1.0
+    unique_docs, sources, scores, doc_places, doc_vectors = [], set(), [], set(), []
+    for point in points:
+        unique_docs.append(point.payload["doc"])
+        sources.add(point.payload.get("source", "unknown"))
+        doc_places.add(point.payload.get("place", "general"))
+        dense = np.asarray(point.vector[""] if isinstance(point.vector, dict) else point.vector, dtype=np.float32)
+        doc_vectors.append(dense)
+        scores.append(float(np.dot(query_arr, dense) / (query_norm * (np.linalg.norm(dense) or 1.0))))
+    scores = sorted((s for s in scores if s >= 0.3), reverse=True)
+    avg_score = sum(scores[:3]) / min(3, len(scores)) if scores else 0
+    if avg_score > 0.7:
+        confidence = "high"
+    elif avg_score > 0.4:
+        confidence = "medium"
+    elif avg_score > 0:
+        confidence = "low"
+    else:
+        confidence = "very_low"
+    return unique_docs, confidence, list(sources), list(doc_places), doc_vectors
+
+async def retrieve_many(queries: List[str], query_vecs: list, places_per_query: List[Optional[List[str]]],
+                        top_k=5) -> List[tuple[List[str], str, List[str], List[str], list]]:
+    """Retrieval for several questions in one Qdrant round trip.
+
+    Questions naming known places rank documents about those places first, then fill up from the whole
+    collection (see hybrid_request).
+    """
     try:
-        query_vec = embedder.encode([query])[0]
-        results = qdrant_client.search(
-            collection_name=COLLECTION_NAME,
-            query_vector=query_vec,
-            limit=top_k * 2,
-            with_payload=True,
-            score_threshold=0.3
-        )
-        sem_docs, sources, scores = [], [], []
-        for r in results:
-            sem_docs.append(r.payload["doc"])
-            sources.append(r.payload.get("source", "unknown"))
-            scores.append(r.score)
-        if "tfidf" in store:
-            query_tfidf = store["tfidf"].transform([query])
-            sim_scores = cosine_similarity(query_tfidf, store["tfidf_matrix"]).flatten()
-            top_idx = sim_scores.argsort()[::-1][:top_k]
-            keyword_docs = [docs[i] for i in top_idx if i < len(docs) and sim_scores[i] > 0.1]
-        else:
-            keyword_docs = []
-        all_docs = sem_docs + keyword_docs
-        unique_docs = list(dict.fromkeys(all_docs))[:top_k]
-        avg_score = sum(scores[:3]) / min(3, len(scores)) if scores else 0
-        if avg_score > 0.7:
-            confidence = "high"
-        elif avg_score > 0.4:
-            confidence = "medium"
-        elif avg_score > 0:
-            confidence = "low"
-        else:
-            confidence = "very_low"
-        return unique_docs, confidence, list(set(sources))
+        known = [[place for place in places or [] if place in place_gazetteer] for places in places_per_query]
+        results = await hybrid_query_batch([hybrid_request(query, query_vec, top_k, places)
+                                            for query, query_vec, places in zip(queries, query_vecs, known)])
+        return [summarize_hits(points, query_vec) for points, query_vec in zip(results, query_vecs)]
     except Exception as e:
         logger.error(f"Intelligent retrieval failed: {e}")
-        return [], "error", ["fallback"]
+        return [([], "error", ["fallback"], [], []) for _ in queries]
+
+async def retrieve_with_intelligence(query: str, top_k=5, query_vec=None,
+                                     places: Optional[List[str]] = None) -> tuple[List[str], str, List[str], List[str], list]:
+    try:
+        if query_vec is None:
+            query_vec = await embed_query(query)
+    except Exception as e:
+        logger.error(f"Intelligent retrieval failed: {e}")
+        return [], "error", ["fallback"], [], []
+    return (await retrieve_many([query], [query_vec], [places], top_k))[0]
+
+# ----------------------------
+# Semantic Answer Cache
+class SemanticAnswerCache:
+    """Answers keyed by question embedding; a hit needs a close paraphrase *and* the same retrieved context"""
+    def __init__(self, max_size: int, ttl: float, threshold: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.entries: OrderedDict = OrderedDict()
+        self.by_context: Dict[str, Set[int]] = defaultdict(set)
+        self.by_place: Dict[str, Set[int]] = defaultdict(set)
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, query_vec, fingerprint: str) -> Optional[str]:
+        # Only entries built from the same context are candidates, so the similarity scan stays tiny
+        now = time.monotonic()
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vec) or 1.0
+        best_id, best_sim = None, self.threshold
+        for entry_id in list(self.by_context.get(fingerprint, ())):
+            entry = self.entries[entry_id]
+            if entry["expires"] < now:
+                self._drop(entry_id)
+                continue
+            sim = float(np.dot(query_vec, entry["vector"]) / (query_norm * entry["norm"]))
+            if sim >= best_sim:
+                best_id, best_sim = entry_id, sim
+        if best_id is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(best_id)
+        self.hits += 1
+        return self.entries[best_id]["answer"]
+
+    def store(self, query_vec, fingerprint: str, answer: str, places: List[str]):
+        vector = np.asarray(query_vec, dtype=np.float32)
+        entry_id = self.next_id
+        self.next_id += 1
+        place_keys = {p.lower() for p in places}
+        self.entries[entry_id] = {
+            "vector": vector,
+            "norm": float(np.linalg.norm(vector)) or 1.0,
+            "fingerprint": fingerprint,
+            "answer": answer,
+            "places": place_keys,
+            "expires": time.monotonic() + self.ttl
+        }
+        self.by_context[fingerprint].add(entry_id)
+        for key in place_keys:
+            self.by_place[key].add(entry_id)
+        while len(self.entries) > self.max_size:
+            self._drop(next(iter(self.entries)))
+
+    def invalidate_place(self, place: str) -> int:
+        entry_ids = self.by_place.pop(place.lower(), set())
+        for entry_id in entry_ids:
+            self._drop(entry_id)
+        if entry_ids:
+            logger.info(f"Invalidated {len(entry_ids)} cached answers referencing {place}")
+        return len(entry_ids)
+
+    def _drop(self, entry_id: int):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        context_ids = self.by_context.get(entry["fingerprint"])
+        if context_ids is not None:
+            context_ids.discard(entry_id)
+            if not context_ids:
+                del self.by_context[entry["fingerprint"]]
+        for key in entry["places"]:
+            place_ids = self.by_place.get(key)
+            if place_ids is not None:
+                place_ids.discard(entry_id)
+                if not place_ids:
+                    del self.by_place[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+answer_cache = SemanticAnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_THRESHOLD)
+
+def context_fingerprint(context_docs: List[str]) -> str:
+    return hashlib.sha1("\x1f".join(sorted(context_docs)).encode("utf-8")).hexdigest()
 
 # ----------------------------
 # Smart Prompt Engineering
-def create_intelligent_prompt(question: str, context_docs: List[str], places: List[str]) -> str:
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text; close enough to budget a prompt without a tokenizer
+    return (len(text) + 3) // 4
+
+def clip_to_tokens(text: str, tokens: int) -> str:
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 1)].rsplit(" ", 1)[0] + "…"
+
+def pack_history(turns: List[tuple[str, str]], budget: int = HISTORY_TOKEN_BUDGET) -> str:
+    """Earlier turns fitted into `budget` tokens, so the prompt stays the same size however long the conversation.
+
+    The newest turns are kept, each clipped to a third of the budget; turns that no longer fit are
+    reduced to a single line listing what the traveler asked, which has a fifth of the budget set aside.
+    """
+    reserve = budget // 5 if len(turns) > 1 else 0
+    packed, remaining, kept = [], budget - reserve, 0
+    for question, answer in reversed(turns):
+        turn = clip_to_tokens(f"Traveler: {question}\nAgent: {answer}", max(1, budget // 3))
+        cost = estimate_tokens(turn) + 1    # the joining newline
+        if cost > remaining:
+            break
+        packed.append(turn)
+        remaining -= cost
+        kept += 1
+    remaining += reserve
+    older = turns[:len(turns) - kept]
+    if older and remaining >= 8:
+        packed.append(clip_to_tokens("Earlier the traveler asked (latest first): " + "; ".join(q for q, _ in reversed(older)), remaining))
+    return "\n".join(reversed(packed))
+
+def pack_context(query_vec, docs: List[str], doc_vectors: list, budget: int = CONTEXT_TOKEN_BUDGET,
+                 mmr_lambda: float = CONTEXT_MMR_LAMBDA,
+                 duplicate_threshold: float = CONTEXT_DUPLICATE_THRESHOLD) -> tuple[List[str], int]:
+    """Retrieved docs chosen by maximal marginal relevance to fit `budget` tokens, most relevant first.
+
+    Uses the dense vectors retrieval already returned. A doc nearly identical to one already chosen is
+    dropped. Returns the docs and the context tokens saved versus sending every retrieved doc.
+    """
+    if not docs:
+        return [], 0
+    vectors = np.asarray(doc_vectors, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vec, dtype=np.float32)
+    relevance = vectors @ (query / (np.linalg.norm(query) or 1.0))
+    similarity = vectors @ vectors.T
+    redundancy = np.zeros(len(docs), dtype=np.float32)
+    candidates, chosen, remaining = list(range(len(docs))), [], budget
+    while candidates:
+        scores = mmr_lambda * relevance[candidates] - (1 - mmr_lambda) * redundancy[candidates]
+        best = candidates.pop(int(np.argmax(scores)))
+        cost = estimate_tokens(docs[best]) + 2    # the "---" separator
+        if redundancy[best] >= duplicate_threshold or cost > remaining:
+            continue
+        chosen.append(best)
+        remaining -= cost
+        redundancy = np.maximum(redundancy, similarity[best])
+    chosen.sort(key=lambda i: -relevance[i])
+    packed = [docs[i] for i in chosen]
+    if not packed:
+        # Even the most relevant doc is over budget on its own
+        packed = [clip_to_tokens(docs[int(np.argmax(relevance))], budget)]
+    saved = estimate_tokens("\n---\n".join(docs)) - estimate_tokens("\n---\n".join(packed))
+    return packed, max(0, saved)
+
+def create_intelligent_prompt(question: str, context_docs: List[str], places: List[str], history: str = "") -> str:
     context = "\n---\n".join(context_docs) if context_docs else "No specific information available."
     unknown_places_text = ", ".join(places) if places else "the requested location"
-    prompt = f"Limited info on {unknown_places_text}.\nContext:\n{context}\nQuestion: {question}\nProvide practical travel advice while being honest about information gaps."
+    conversation = f"Conversation so far:\n{history}\n" if history else ""
+    prompt = f"Limited info on {unknown_places_text}.\n{conversation}Context:\n{context}\nQuestion: {question}\nProvide practical travel advice while being honest about information gaps."
     return prompt
 
 # ----------------------------
 # Gemini Integration
-def generate_intelligent_answer(question: str, context_docs: List[str], places: List[str]) -> str:
-    prompt = create_intelligent_prompt(question, context_docs, places)
+EMPTY_ANSWER = "Sorry, I couldn't generate a response."
+UNAVAILABLE_ANSWER = "I'm currently unable to process your request. Please try again later or consult reliable travel resources."
+
+class GeminiUnavailable(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class RetryableGeminiError(Exception):
+    pass
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+AUTH_FAILURE_STATUS = {401, 403}   # a revoked or invalid key fails every call, so these count against the breaker
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failed calls, then lets one trial call through every `reset_timeout` seconds"""
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning(f"Gemini circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+class GeminiClient:
+    """Long-lived Gemini REST client: pooled connections, bounded concurrency, deadlines, jittered retries"""
+    def __init__(self, api_key: Optional[str], model: str, base_url: str, max_concurrency: int,
+                 timeout: float, deadline: float, max_retries: int, breaker: CircuitBreaker):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.breaker = breaker
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+
+    async def start(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+                headers={"x-goog-api-key": self.api_key or ""}
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _url(self, method: str) -> str:
+        return f"{self.base_url}/v1beta/models/{self.model}:{method}"
+
+    @staticmethod
+    def _body(prompt: str) -> dict:
+        return {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+
+    @staticmethod
+    def _text(payload: dict) -> str:
+        candidates = payload.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+    async def _raise_for_status(self, response: aiohttp.ClientResponse):
+        if response.status in RETRYABLE_STATUS:
+            raise RetryableGeminiError(f"HTTP {response.status}")
+        if response.status != 200:
+            detail = (await response.text())[:200]
+            raise GeminiUnavailable(f"HTTP {response.status}: {detail}", status=response.status)
+
+    @asynccontextmanager
+    async def _slot(self):
+        async with self.slots:
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    async def _with_retries(self, attempt_fn):
+        """Runs attempt_fn(timeout) under the breaker, retrying retryable errors with full-jitter backoff"""
+        if not self.breaker.allow():
+            raise GeminiUnavailable("circuit open")
+        await self.start()
+        self.calls += 1
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                result = await attempt_fn(min(self.timeout, remaining))
+                self.breaker.record_success()
+                return result
+            except (RetryableGeminiError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                backoff = random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+                if attempt >= self.max_retries or time.monotonic() - started + backoff >= self.deadline:
+                    self.failures += 1
+                    self.breaker.record_failure()
+                    raise GeminiUnavailable(f"gave up after {attempt + 1} attempts: {e!r}")
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(backoff)
+            except GeminiUnavailable as e:
+                self.failures += 1
+                if e.status in AUTH_FAILURE_STATUS:
+                    self.breaker.record_failure()
+                else:
+                    # Other request errors say nothing about upstream health, but a failed trial does not close the circuit
+                    self.breaker.trial_in_flight = False
+                raise
+            except asyncio.CancelledError:
+                self.breaker.trial_in_flight = False
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise GeminiUnavailable(f"unexpected error: {e!r}") from e
+
+    async def generate(self, prompt: str) -> str:
+        async def attempt(timeout: float) -> str:
+            async with self._slot():
+                async with self.session.post(self._url("generateContent"), json=self._body(prompt),
+                                             timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    await self._raise_for_status(response)
+                    return self._text(await response.json())
+        return await self._with_retries(attempt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yields text chunks; retries only happen before the first chunk is delivered"""
+        async def attempt(timeout: float) -> aiohttp.ClientResponse:
+            response = await self.session.post(self._url("streamGenerateContent"), params={"alt": "sse"},
+                                               json=self._body(prompt),
+                                               timeout=aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout))
+            try:
+                await self._raise_for_status(response)
+            except Exception:
+                response.release()
+                raise
+            return response
+
+        async with self._slot():
+            response = await self._with_retries(attempt)
+            try:
+                async for line in response.content:
+                    line = line.decode("utf-8").strip()
+                    if line.startswith("data:"):
+                        text = self._text(json.loads(line[len("data:"):]))
+                        if text:
+                            yield text
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # The call already counted as a success when the stream opened; a broken stream is still a failure
+                self.failures += 1
+                self.breaker.record_failure()
+                raise GeminiUnavailable(f"stream interrupted: {e!r}") from e
+            finally:
+                response.release()
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries
+        }
+
+gemini_client = GeminiClient(
+    GEMINI_API_KEY, GEMINI_MODEL, GEMINI_API_BASE, GEMINI_MAX_CONCURRENCY,
+    GEMINI_TIMEOUT, GEMINI_DEADLINE, GEMINI_MAX_RETRIES,
+    CircuitBreaker(GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET)
+)
+
+async def generate_intelligent_answer(question: str, context_docs: List[str], places: List[str], history: str = "") -> str:
+    prompt = create_intelligent_prompt(question, context_docs, places, history)
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        
-        # This is the corrected structure for the content
-        response = model.generate_content([
-            {"role": "user", "parts": [{"text": prompt}]}
-        ])
-        
-        return response.text.strip() if response and response.text else "Sorry, I couldn't generate a response."
+        with metrics.time("generate"):
+            text = await gemini_client.generate(prompt)
+        return text.strip() if text else EMPTY_ANSWER
     except Exception as e:
         logger.error(f"Gemini request failed: {e}")
-        return "I'm currently unable to process your request. Please try again later or consult reliable travel resources."
+        return UNAVAILABLE_ANSWER
+
+async def stream_intelligent_answer(question: str, context_docs: List[str], places: List[str],
+                                    history: str = "") -> AsyncIterator[str]:
+    """Yields answer chunks; a failure before the first chunk yields UNAVAILABLE_ANSWER, a later one re-raises"""
+    prompt = create_intelligent_prompt(question, context_docs, places, history)
+    produced = False
+    started = time.perf_counter()
+    try:
+        async for text in gemini_client.stream(prompt):
+            if not produced:
+                metrics.observe("travel_stage_seconds", time.perf_counter() - started, stage="generate_first_token")
+            produced = True
+            yield text
+        metrics.observe("travel_stage_seconds", time.perf_counter() - started, stage="generate_stream")
+        if not produced:
+            yield EMPTY_ANSWER
+    except Exception as e:
+        metrics.inc("travel_stage_errors_total", stage="generate_stream")
+        logger.error(f"Gemini streaming request failed: {e}")
+        if produced:
+            # The caller already holds a partial answer and must not treat it as complete
+            raise
+        yield UNAVAILABLE_ANSWER
 # ----------------------------
 # Background Learning Tasks
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second in bursts of up to `burst`; rate <= 0 disables it"""
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class LearningWorkerPool:
+    """`concurrency` workers draining the learning queue, each lookup throttled by its source's rate limit.
+
+    Every lookup runs as a single flight per place: queue workers and /ask requests that want the same
+    place share one task instead of fetching it again.
+    """
+    def __init__(self, concurrency: int, max_retries: int, retry_backoff: float, rate_limits: Dict[str, RateLimiter]):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.rate_limits = rate_limits
+        self.workers: List[asyncio.Task] = []
+        self.flights: Dict[str, asyncio.Task] = {}
+        self.learned = 0
+        self.failed = 0
+        self.retries = 0
+        self.joined = 0
+        self.queue_wait = deque(maxlen=1000)
+        self.learn_time = deque(maxlen=1000)
+
+    def start(self):
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        tasks = self.workers + list(self.flights.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+
+    def flight(self, place: str, claimed: bool = False) -> asyncio.Task:
+        """The running lookup for `place`, started if there is none; resolves to True when something was learned.
+
+        `claimed` means the caller already holds the queue claim (it came from `get`).
+        """
+        task = self.flights.get(place)
+        if task is not None:
+            self.joined += 1
+            return task
+        task = asyncio.create_task(self._start(place, claimed))
+        self.flights[place] = task
+        task.add_done_callback(lambda _: self.flights.pop(place, None))
+        return task
+
+    async def _start(self, place: str, claimed: bool) -> bool:
+        if claimed or await intel_system.backend.run(intel_system.learning_queue.take, place):
+            return await self._run(place)
+        return await self._await_claim(place)
+
+    async def _learn(self, place: str) -> bool:
+        await self.rate_limits["web"].acquire()
+        new_info = await search_web_for_place(place)
+        return bool(new_info) and await ingest_travel_data(new_info, place)
+
+    async def _run(self, place: str) -> bool:
+        started = time.monotonic()
+        try:
+            logger.info(f"Learning about {place}...")
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self.retries += 1
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                try:
+                    if await self._learn(place):
+                        self.learned += 1
+                        logger.info(f"Successfully learned about {place}")
+                        return True
+                except Exception as e:
+                    logger.error(f"Learning {place} failed (attempt {attempt + 1}): {e}")
+            self.failed += 1
+            logger.error(f"Giving up on learning {place} after {self.max_retries + 1} attempts")
+            return False
+        except asyncio.CancelledError:
+            # Shutting down: hand the place back so the snapshot keeps it queued
+            await intel_system.backend.run(self._requeue, place)
+            raise
+        finally:
+            self.learn_time.append(time.monotonic() - started)
+            metrics.observe("travel_stage_seconds", time.monotonic() - started, stage="learn")
+            await intel_system.backend.run(intel_system.learning_queue.done, place)
+
+    @staticmethod
+    def _requeue(place: str):
+        intel_system.learning_queue.done(place)
+        intel_system.learning_queue.push(place, intel_system.unknown_places.get(place, 1))
+
+    async def _await_claim(self, place: str) -> bool:
+        """Another process is learning `place`; its documents land in the shared collection when it finishes"""
+        deadline = time.monotonic() + LEARN_CLAIM_TIMEOUT
+        while await intel_system.backend.run(intel_system.learning_queue.claimed, place) and time.monotonic() < deadline:
+            await asyncio.sleep(STATE_POLL_INTERVAL)
+        return await intel_system.backend.run(intel_system.recently_learned.__contains__, place)
+
+    async def _worker(self):
+        while True:
+            place, waited = await intel_system.learning_queue.get()
+            self.queue_wait.append(waited)
+            await self.flight(place, claimed=True)
+
+    def stats(self, queue_depth: int) -> dict:
+        return {
+            "workers": len(self.workers),
+            "in_flight": len(self.flights),
+            "queue_depth": queue_depth,
+            "learned": self.learned,
+            "failed": self.failed,
+            "retries": self.retries,
+            "joined_flights": self.joined,
+            "queue_wait_p50_sec": round(percentile(self.queue_wait, 0.5), 3),
+            "queue_wait_p95_sec": round(percentile(self.queue_wait, 0.95), 3),
+            "learn_p50_sec": round(percentile(self.learn_time, 0.5), 3),
+            "learn_p95_sec": round(percentile(self.learn_time, 0.95), 3)
+        }
+
+learning_pool = LearningWorkerPool(LEARN_CONCURRENCY, LEARN_MAX_RETRIES, LEARN_RETRY_BACKOFF,
+                                   {"web": RateLimiter(LEARN_WEB_RATE, LEARN_WEB_BURST)})
+
 async def background_learner():
+    learning_pool.start()
     while True:
         try:
-            intel_system.cleanup_old_data()
-            if intel_system.learning_queue:
-                place = intel_system.learning_queue.pop()
-                logger.info(f"Learning about {place}...")
-                new_info = await search_web_for_place(place)
-                if new_info:
-                    ingest_travel_data(new_info, place)
-                    logger.info(f"Successfully learned about {place}")
-            await asyncio.sleep(60)
+            await intel_system.backend.run(intel_system.cleanup_old_data)
+            # Other workers sharing the state backend learn places too
+            for place in await intel_system.backend.run(list, intel_system.recently_learned):
+                place_gazetteer.add(place)
         except Exception as e:
             logger.error(f"Background learning error: {e}")
-            await asyncio.sleep(300)
+        await asyncio.sleep(60)
 
 # ----------------------------
 # API Endpoints
 @app.on_event("startup")
 async def startup_tasks():
+    await setup_qdrant_collection()
+    await gemini_client.start()
+    # Model loading and seeding happen in the background; /health answers as soon as Qdrant is set up
+    asyncio.create_task(warmup_embedder())
+    restore_snapshot()
+    for place in await intel_system.backend.run(list, intel_system.recently_learned):
+        place_gazetteer.add(place)
+    # Seeding encodes, which would load the model; it runs in the background so startup does not wait for it
+    asyncio.create_task(seed_knowledge_base())
+    asyncio.create_task(background_learner())
+    logger.info("Started background learning system")
+    if SNAPSHOT_INTERVAL > 0:
+        asyncio.create_task(snapshot_loop())
+
+async def seed_knowledge_base():
+    # Seed documents carry their place so place-filtered retrieval finds them
     travel_knowledge = [
-        "Paris, France is famous for the Eiffel Tower, Louvre Museum, Seine River cruises, and charming café culture.",
-        "Tokyo, Japan offers diverse attractions including Shibuya Crossing, Tokyo Tower, ancient temples, and modern technology districts.",
-        "New York City features iconic landmarks like Times Square, Central Park, Statue of Liberty, and world-class Broadway shows.",
-        "The Maldives is renowned for luxury overwater resorts, crystal-clear waters perfect for snorkeling and diving, and pristine white sandy beaches.",
-        "Dubai, UAE showcases the Burj Khalifa, thrilling desert safaris, luxury shopping malls, and innovative architecture.",
-        "Rome, Italy captivates visitors with the Colosseum, Vatican City, ancient Roman Forum, and authentic Italian cuisine.",
-        "Bali, Indonesia is known for beautiful temples, terraced rice fields, volcanic landscapes, and wellness retreats.",
-        "London, England offers Big Ben, British Museum, Tower Bridge, and rich royal history with modern cultural scenes.",
-        "Thailand combines bustling Bangkok markets, serene temples, tropical beaches in Phuket, and delicious street food.",
-        "Iceland provides stunning natural wonders including Northern Lights, geysers, waterfalls, and unique volcanic landscapes."
+        ("Paris", "Paris, France is famous for the Eiffel Tower, Louvre Museum, Seine River cruises, and charming café culture."),
+        ("Tokyo", "Tokyo, Japan offers diverse attractions including Shibuya Crossing, Tokyo Tower, ancient temples, and modern technology districts."),
+        ("New York City", "New York City features iconic landmarks like Times Square, Central Park, Statue of Liberty, and world-class Broadway shows."),
+        ("Maldives", "The Maldives is renowned for luxury overwater resorts, crystal-clear waters perfect for snorkeling and diving, and pristine white sandy beaches."),
+        ("Dubai", "Dubai, UAE showcases the Burj Khalifa, thrilling desert safaris, luxury shopping malls, and innovative architecture."),
+        ("Rome", "Rome, Italy captivates visitors with the Colosseum, Vatican City, ancient Roman Forum, and authentic Italian cuisine."),
+        ("Bali", "Bali, Indonesia is known for beautiful temples, terraced rice fields, volcanic landscapes, and wellness retreats."),
+        ("London", "London, England offers Big Ben, British Museum, Tower Bridge, and rich royal history with modern cultural scenes."),
+        ("Thailand", "Thailand combines bustling Bangkok markets, serene temples, tropical beaches in Phuket, and delicious street food."),
+        ("Iceland", "Iceland provides stunning natural wonders including Northern Lights, geysers, waterfalls, and unique volcanic landscapes.")
     ]
-    success = ingest_travel_data(travel_knowledge)
-    if success:
+    results = [await ingest_travel_data([doc], place, source="initial_data") for place, doc in travel_knowledge]
+    if all(results):
         logger.info("Successfully loaded initial travel knowledge base")
     else:
         logger.error("Failed to load initial knowledge base")
-    asyncio.create_task(background_learner())
-    logger.info("Started background learning system")
+
+CONFIDENCE_LABELS = {
+    "high": "High - Based on comprehensive information",
+    "medium": "Medium - Based on available information", 
+    "low": "Low - Limited specific information available",
+    "very_low": "Very Low - General guidance provided",
+    "error": "Error - Technical difficulties encountered"
+}
+
+async def prepare_answer_contexts(questions: List[str]) -> List[dict]:
+    """Everything /ask needs before generation: retrieval, confidence and on-demand learning.
+
+    Questions are encoded in one call and retrieved in one batch. A place asked about often enough is
+    learned through its single-flight lookup; requests wait at most LEARN_WAIT_TIMEOUT for it and
+    otherwise answer with what is already known.
+    """
+    with metrics.time("extract_places"):
+        places_per_question = [extract_place_names(question) for question in questions]
+    query_vecs = await embed_queries(questions)
+    retrieved = await retrieve_many(questions, query_vecs, places_per_question)
+    learned_new_info = [False] * len(questions)
+    flights: Dict[int, List[asyncio.Task]] = {}
+    for i, places in enumerate(places_per_question):
+        if retrieved[i][1] in ["low", "very_low"] and places:
+            for place in places:
+                if await intel_system.backend.run(intel_system.track_unknown_place, place) >= 3:
+                    flights.setdefault(i, []).append(learning_pool.flight(place))
+    if flights and LEARN_WAIT_TIMEOUT > 0:
+        # Lookups keep running after the timeout; a later request picks up what they learn
+        with metrics.time("learning_wait"):
+            done, _ = await asyncio.wait({task for tasks in flights.values() for task in tasks}, timeout=LEARN_WAIT_TIMEOUT)
+        learned = {task for task in done if not task.cancelled() and task.exception() is None and task.result()}
+        refresh = [i for i, tasks in flights.items() if learned.intersection(tasks)]
+        if refresh:
+            fresh = await retrieve_many([questions[i] for i in refresh], [query_vecs[i] for i in refresh],
+                                        [places_per_question[i] for i in refresh])
+            for i, result in zip(refresh, fresh):
+                retrieved[i] = result
+                learned_new_info[i] = True
+    ctxs = []
+    for places, query_vec, result, learned in zip(places_per_question, query_vecs, retrieved, learned_new_info):
+        docs, confidence, sources, doc_places, doc_vectors = result
+        metrics.inc("travel_answers_total", confidence=confidence)
+        context_docs, tokens_saved = pack_context(query_vec, docs, doc_vectors)
+        ctxs.append({
+            "places": places,
+            "query_vec": query_vec,
+            "docs": docs,
+            "context_docs": context_docs,
+            "prompt_tokens_saved": tokens_saved,
+            "confidence": confidence,
+            "sources": sources,
+            "doc_places": doc_places,
+            "fingerprint": context_fingerprint(docs),
+            "learned_new_info": learned
+        })
+    return ctxs
+
+async def prepare_answer_context(question: str) -> dict:
+    return (await prepare_answer_contexts([question]))[0]
+
+def cache_answer(ctx: dict, answer: str):
+    if answer not in (EMPTY_ANSWER, UNAVAILABLE_ANSWER):
+        answer_cache.store(ctx["query_vec"], ctx["fingerprint"], answer, ctx["places"] + ctx["doc_places"])
+
+def lookup_cached_answer(ctx: dict, history: str) -> Optional[str]:
+    # A follow-up's answer depends on the conversation, so only questions without one use the cache
+    return None if history else answer_cache.lookup(ctx["query_vec"], ctx["fingerprint"])
+
+def request_session_id(input: QuestionInput) -> Optional[str]:
+    """The session a question belongs to; one-off questions get none, so they neither store nor evict anything"""
+    return input.session_id or (uuid.uuid4().hex if input.start_session else None)
+
+async def record_turn(session_id: Optional[str], turns: List[tuple[str, str]], question: str, answer: str) -> List[QA]:
+    """Stores the turn in the session and returns the session's history including it"""
+    if session_id is None:
+        return [QA(question=question, answer=answer)]
+    if answer not in (EMPTY_ANSWER, UNAVAILABLE_ANSWER):
+        await intel_system.backend.run(session_store.append, session_id, question, answer)
+    turns = (turns + [(question, answer)])[-SESSION_MAX_TURNS:]
+    return [QA(question=q, answer=a) for q, a in turns]
+
+async def answer_question(question: str, ctx: dict, slots: Optional[asyncio.Semaphore] = None,
+                          session_id: Optional[str] = None) -> AnswerResponse:
+    turns = await intel_system.backend.run(session_store.turns, session_id) if session_id else []
+    history = pack_history(turns)
+    answer = lookup_cached_answer(ctx, history)
+    if answer is None:
+        if slots is None:
+            answer = await generate_intelligent_answer(question, ctx["context_docs"], ctx["places"], history)
+        else:
+            async with slots:
+                answer = await generate_intelligent_answer(question, ctx["context_docs"], ctx["places"], history)
+        metrics.inc("travel_prompt_tokens_saved_total", ctx["prompt_tokens_saved"])
+        if not history:
+            cache_answer(ctx, answer)
+    return AnswerResponse(
+        question=question,
+        answer=answer,
+        confidence_level=CONFIDENCE_LABELS.get(ctx["confidence"], "Unknown"),
+        data_sources=ctx["sources"],
+        learned_new_info=ctx["learned_new_info"],
+        history=await record_turn(session_id, turns, question, answer),
+        session_id=session_id,
+        prompt_tokens_saved=ctx["prompt_tokens_saved"]
+    )
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.on_event("shutdown")
+async def shutdown_tasks():
+    await learning_pool.stop()
+    await save_snapshot()
+    await gemini_client.close()
 
 @app.post("/ask", response_model=AnswerResponse)
 async def intelligent_ask(request: Request, input: QuestionInput):
     try:
-        places = extract_place_names(input.question)
-        store = getattr(app.state, 'vector_store', {"docs": []})
-        docs = store.get("docs", [])
-        relevant_docs, confidence, sources = retrieve_with_intelligence(input.question, store, docs)
-        learned_new_info = False
-        if confidence in ["low", "very_low"] and places:
-            for place in places:
-                intel_system.track_unknown_place(place)
-                if intel_system.unknown_places[place] >= 3:
-                    new_info = await search_web_for_place(place)
-                    if new_info:
-                        ingest_travel_data(new_info, place)
-                        relevant_docs, confidence, sources = retrieve_with_intelligence(input.question, store, docs)
-                        learned_new_info = True
-        answer = generate_intelligent_answer(input.question, relevant_docs, places)
-        confidence_map = {
-            "high": "High - Based on comprehensive information",
-            "medium": "Medium - Based on available information", 
-            "low": "Low - Limited specific information available",
-            "very_low": "Very Low - General guidance provided",
-            "error": "Error - Technical difficulties encountered"
-        }
-        return AnswerResponse(
-            question=input.question,
-            answer=answer,
-            confidence_level=confidence_map.get(confidence, "Unknown"),
-            data_sources=sources,
-            learned_new_info=learned_new_info,
-            history=[QA(question=input.question, answer=answer)]
-        )
+        ctx = await prepare_answer_context(input.question)
+        return await answer_question(input.question, ctx, session_id=request_session_id(input))
     except Exception as e:
         logger.error(f"Intelligent ask failed: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Processing failed - please try again")
 
+@app.post("/ask/batch", response_model=BatchAnswerResponse)
+async def intelligent_ask_batch(input: BatchQuestionInput):
+    """Answers related questions together: one encode, batched retrieval, generations run concurrently"""
+    if not input.questions:
+        raise HTTPException(status_code=400, detail="No questions given")
+    if len(input.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUESTIONS} questions per batch")
+    try:
+        ctxs = await prepare_answer_contexts(input.questions)
+        slots = asyncio.Semaphore(BATCH_GENERATION_CONCURRENCY)
+        answers = await asyncio.gather(*(answer_question(question, ctx, slots)
+                                         for question, ctx in zip(input.questions, ctxs)))
+        return BatchAnswerResponse(answers=answers)
+    except Exception as e:
+        logger.error(f"Intelligent ask (batch) failed: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Processing failed - please try again")
+
+@app.post("/ask/stream")
+async def intelligent_ask_stream(input: QuestionInput):
+    """Server-sent events: one `meta` event with retrieval details, `token` events, then `done`.
+
+    Retrieval, including the on-demand learning wait, runs inside the stream so the headers go out at once.
+    If preparing or generating the answer fails the stream ends with an `error` event instead, and a
+    partial answer is neither cached nor stored in the session.
+    """
+    session_id = request_session_id(input)
+
+    async def events():
+        try:
+            ctx = await prepare_answer_context(input.question)
+            turns = await intel_system.backend.run(session_store.turns, session_id) if session_id else []
+        except Exception:
+            logger.error(f"Intelligent ask (stream) failed: {traceback.format_exc()}")
+            yield sse_event("error", {"status": 500, "detail": "Processing failed - please try again"})
+            return
+        yield sse_event("meta", {
+            "question": input.question,
+            "confidence_level": CONFIDENCE_LABELS.get(ctx["confidence"], "Unknown"),
+            "data_sources": ctx["sources"],
+            "learned_new_info": ctx["learned_new_info"],
+            "session_id": session_id,
+            "prompt_tokens_saved": ctx["prompt_tokens_saved"]
+        })
+        history = pack_history(turns)
+        answer = lookup_cached_answer(ctx, history)
+        if answer is not None:
+            yield sse_event("token", {"text": answer})
+        else:
+            parts = []
+            metrics.inc("travel_prompt_tokens_saved_total", ctx["prompt_tokens_saved"])
+            try:
+                async for text in stream_intelligent_answer(input.question, ctx["context_docs"], ctx["places"], history):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+            except Exception:
+                yield sse_event("error", {"status": 502, "detail": "The answer was interrupted - please try again"})
+                return
+            answer = "".join(parts).strip()
+            if not history:
+                cache_answer(ctx, answer)
+        await record_turn(session_id, turns, input.question, answer)
+        yield sse_event("done", {"answer": answer})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.post("/contribute")
 async def contribute_knowledge(contribution: ContributeInfo):
     try:
         if len(contribution.information.strip()) < 10:
             raise HTTPException(status_code=400, detail="Information too short")
-        intel_system.user_contributions.append({
+        await intel_system.backend.run(intel_system.user_contributions.append, {
             "place": contribution.place,
             "info": contribution.information,
             "user_id": contribution.user_id,
             "timestamp": datetime.now().isoformat()
         })
-        ingest_travel_data([contribution.information], contribution.place)
+        await ingest_travel_data([contribution.information], contribution.place)
         logger.info(f"New contribution for {contribution.place} from {contribution.user_id}")
         return {
             "status": "success",
@@ -370,18 +2466,111 @@ async def contribute_knowledge(contribution: ContributeInfo):
         logger.error(f"Contribution failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to process contribution")
 
+@app.post("/ingest/bulk")
+async def start_bulk_ingest(request: BulkIngestRequest):
+    """Starts a bulk load of a JSONL/CSV file under BULK_INGEST_DIR; poll /ingest/bulk/{job_id} for progress"""
+    # realpath resolves symlinks, so a link inside the directory cannot point outside it
+    path = os.path.realpath(os.path.join(BULK_INGEST_DIR, request.path))
+    if os.path.commonpath([path, BULK_INGEST_DIR]) != BULK_INGEST_DIR:
+        raise HTTPException(status_code=400, detail="Path must be inside the bulk ingest directory")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    if request.format not in (None, "jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="Format must be 'jsonl' or 'csv'")
+    if any(job["path"] == path and job["status"] == "running" for job in bulk_jobs.values()):
+        raise HTTPException(status_code=409, detail="This file is already being ingested")
+    prune_bulk_jobs()
+    job_id = uuid.uuid4().hex
+    bulk_jobs[job_id] = {"path": path, "status": "running"}
+
+    async def run_job():
+        try:
+            await bulk_ingest(path, request.format, max(1, request.chunk_size), max(1, request.parallel),
+                              request.resume, progress=bulk_jobs[job_id])
+        except Exception as e:
+            bulk_jobs[job_id].update({"status": "failed", "error": str(e)})
+
+    asyncio.create_task(run_job())
+    return {"job_id": job_id, "status": "running"}
+
+@app.get("/ingest/bulk/{job_id}")
+async def bulk_ingest_status(job_id: str):
+    if job_id not in bulk_jobs:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return bulk_jobs[job_id]
+
 @app.get("/system-status")
 async def get_system_status():
+    state = await intel_system.backend.run(intel_system.stats)
     return {
         "status": "operational",
-        "unknown_places_being_tracked": len(intel_system.unknown_places),
-        "learning_queue_size": len(intel_system.learning_queue),
-        "recently_learned_places": len(intel_system.recently_learned),
-        "total_contributions": len(intel_system.user_contributions),
-        "last_cleanup": intel_system.last_cleanup.isoformat(),
-        "most_requested_unknown": dict(intel_system.unknown_places) if intel_system.unknown_places else {}
+        "unknown_places_being_tracked": state["unknown_places"],
+        "learning_queue_size": state["learning_queue"],
+        "recently_learned_places": state["recently_learned"],
+        "known_places": place_gazetteer.size,
+        "active_sessions": await intel_system.backend.run(len, session_store),
+        "total_contributions": state["total_contributions"],
+        "last_cleanup": state["last_cleanup"],
+        "embedder": embedder.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "answer_cache": answer_cache.stats(),
+        "gemini": gemini_client.stats(),
+        "learning": learning_pool.stats(state["learning_queue"]),
+        "most_requested_unknown": state["most_requested_unknown"]
     }
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    if not metrics.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates, not raw paths, keep label cardinality bounded
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.observe("travel_request_seconds", time.perf_counter() - start, path=path)
+        metrics.inc("travel_requests_total", path=path, method=request.method, status=str(status))
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition; component counters and gauges are read here rather than on the hot path"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    gemini = gemini_client.stats()
+    state = await intel_system.backend.run(intel_system.stats)
+    extra = [
+        ("travel_cache_lookups_total", "counter", {"cache": "embedding", "result": "hit"}, embedding_cache.hits),
+        ("travel_cache_lookups_total", "counter", {"cache": "embedding", "result": "miss"}, embedding_cache.misses),
+        ("travel_cache_lookups_total", "counter", {"cache": "answer", "result": "hit"}, answer_cache.hits),
+        ("travel_cache_lookups_total", "counter", {"cache": "answer", "result": "miss"}, answer_cache.misses),
+        ("travel_learning_events_total", "counter", {"event": "learned"}, learning_pool.learned),
+        ("travel_learning_events_total", "counter", {"event": "failed"}, learning_pool.failed),
+        ("travel_learning_events_total", "counter", {"event": "retry"}, learning_pool.retries),
+        ("travel_learning_events_total", "counter", {"event": "joined_flight"}, learning_pool.joined),
+        ("travel_gemini_calls_total", "counter", {"result": "call"}, gemini["calls"]),
+        ("travel_gemini_calls_total", "counter", {"result": "failure"}, gemini["failures"]),
+        ("travel_gemini_calls_total", "counter", {"result": "retry"}, gemini["retries"]),
+        ("travel_embedding_batches_total", "counter", {}, embedding_batcher.batches),
+        ("travel_learning_queue_depth", "gauge", {}, state["learning_queue"]),
+        ("travel_learning_in_flight", "gauge", {}, len(learning_pool.flights)),
+        ("travel_gemini_in_flight", "gauge", {}, gemini["in_flight"]),
+        ("travel_gemini_circuit_open", "gauge", {}, int(gemini["circuit"] == "open")),
+        ("travel_unknown_places_tracked", "gauge", {}, state["unknown_places"]),
+        ("travel_sessions_active", "gauge", {}, await intel_system.backend.run(len, session_store)),
+    ]
+    try:
+        count = await qdrant_client.count(collection_name=COLLECTION_NAME, exact=False)
+        extra.append(("travel_corpus_points", "gauge", {}, count.count))
+    except Exception as e:
+        logger.error(f"Could not count collection points for /metrics: {e}")
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {
@@ -396,6 +2585,28 @@ def health_check():
         ]
     }
 
+async def run_bulk_ingest_cli(args):
+    await setup_qdrant_collection()
+    if qdrant_client is None:
+        raise SystemExit("Qdrant is not reachable")
+    stats = await bulk_ingest(args.path, args.format, args.chunk_size, args.parallel,
+                              resume=not args.no_resume)
+    print(json.dumps(stats, indent=2))
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import argparse
+    parser = argparse.ArgumentParser(description="Intelligent AI Traveling Agent")
+    sub = parser.add_subparsers(dest="command")
+    ingest = sub.add_parser("ingest", help="bulk-load a JSONL/CSV corpus of {doc, place} records into Qdrant")
+    ingest.add_argument("path")
+    ingest.add_argument("--format", choices=["jsonl", "csv"])
+    ingest.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    ingest.add_argument("--parallel", type=int, default=BULK_PARALLEL_UPSERTS)
+    ingest.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        asyncio.run(run_bulk_ingest_cli(args))
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)